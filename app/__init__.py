@@ -10,10 +10,29 @@ def create_app(config_name='development'):
     
     # Load configuration
     app.config.from_object(config[config_name])
+
+    # Set up storage
+    from app.models import BudgetDatabase
+    BudgetDatabase.configure(app.config)
+    from app.utils import chart_cache, month_memo
+    month_memo.maxsize = app.config['MONTH_MEMO_SIZE']
+    month_memo.clear()
+    chart_cache.max_bytes = app.config['CHART_CACHE_BYTES']
+    chart_cache.spill_dir = app.config['CHART_CACHE_DIR']
+    chart_cache.max_disk_bytes = app.config['CHART_CACHE_DISK_BYTES']
+    chart_cache.clear()
+    from app.charts import chart_renderer
+    chart_renderer.configure(
+        app.config['CHART_WORKERS'], app.config['CHART_QUEUE_SIZE'], app.config['CHART_RENDER_TIMEOUT']
+    )
     
     # Register blueprints
     from app.routes import api_bp, main_bp
     app.register_blueprint(main_bp)
     app.register_blueprint(api_bp)
+
+    # Register CLI commands
+    from app.cli import register_commands
+    register_commands(app)
     
     return app
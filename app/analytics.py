@@ -0,0 +1,435 @@
+"""
+Analytics stores for Budget Tracker
+
+``ColumnarStore`` keeps the numeric side of the ledger as flat column files
+that are opened with ``numpy.memmap``, so reports are computed from arrays
+without building a DataFrame or touching per-transaction dicts.
+``MonthlyRollup`` keeps per-month sums and counts so single-month reports
+are dictionary lookups.
+
+Both are ledger cache listeners: they are updated from each change written
+through ``BudgetDatabase`` and rebuilt only when the storage signature they
+were saved with no longer matches.
+"""
+import atexit
+import json
+import logging
+import os
+import tempfile
+import threading
+from datetime import date
+import numpy as np
+from app.storage import file_signature
+
+logger = logging.getLogger(__name__)
+
+ID_WIDTH = 26
+
+# Bumped whenever the on-disk layout changes, forcing a rebuild
+FORMAT = 2
+
+# name -> dtype of every column file; amounts are integer cents and dates
+# are proleptic Gregorian day ordinals
+COLUMNS = {
+    "id": f"S{ID_WIDTH}",
+    "amount": "i8",
+    "date": "i4",
+    "type": "i1",
+    "category": "i4",
+    "live": "u1",
+}
+
+
+def date_to_day(value):
+    """Convert a 'YYYY-MM-DD' string to a day ordinal"""
+    return date.fromisoformat(value[:10]).toordinal()
+
+
+def _normalize(signature):
+    """Make a storage signature comparable with one read back from JSON"""
+    return json.loads(json.dumps(signature))
+
+
+class ColumnarStore:
+    """Memory-mapped column files mirroring the ledger
+
+    Rows are only ever appended; deletes clear the row's ``live`` flag and
+    updates append a replacement row.  ``signature`` records which state of
+    the primary storage the columns reflect, so the store survives restarts
+    and is rebuilt only when the primary storage changed behind its back.
+
+    The files are shared by every process using the ledger.  Changes are
+    made under ``lock`` (the storage's lock) after re-reading meta.json, and
+    a rebuild writes new files rather than truncating the old ones, so
+    other processes' memory maps never lose the pages under them.
+    """
+
+    def __init__(self, directory, lock=None):
+        self.directory = directory
+        self.meta_path = os.path.join(directory, "meta.json")
+        self.lock = lock or threading.RLock()
+        os.makedirs(directory, exist_ok=True)
+        self.meta = self._empty_meta()
+        self._meta_signature = None
+        self._arrays = None
+        self._rows_by_id = None
+        self._refresh()
+
+    @property
+    def signature(self):
+        return self.meta["signature"]
+
+    def sync(self, ledger, signature):
+        """Rebuild the columns if they do not reflect the given storage state"""
+        self._refresh()
+        if self.signature == _normalize(signature):
+            return
+        with self.lock:
+            self._refresh()
+            if self.signature != _normalize(signature):
+                self.rebuild(ledger, signature)
+
+    def rebuild(self, transactions, signature):
+        """Rewrite every column from scratch, into new files"""
+        with self.lock:
+            # Mark the store empty first, so a rebuild that dies midway is
+            # redone on the next start rather than read
+            self.meta = self._empty_meta()
+            self._save_meta(None)
+            self._arrays = None
+            self._rows_by_id = None
+            for name in COLUMNS:
+                if os.path.exists(self._path(name)):
+                    os.remove(self._path(name))
+            self._append_rows(list(transactions))
+            self._save_meta(signature)
+
+    def apply(self, change, ledger, previous, old_signature, new_signature):
+        """Mirror a single ledger change, if the columns were in sync before it
+
+        Called with the storage lock held, around the write itself.
+        """
+        self._refresh()
+        if self.signature != _normalize(old_signature):
+            return
+
+        op = change[0]
+        if op == "add":
+            self._append_rows([change[1]])
+        elif op == "add_many":
+            self._append_rows(change[1])
+        elif op == "delete":
+            self._kill(change[1])
+        elif op == "update":
+            self._kill(change[1])
+            self._append_rows([ledger.get(change[1])])
+        else:
+            self.rebuild(ledger, new_signature)
+            return
+        self._save_meta(new_signature)
+
+    def arrays(self):
+        """Return the columns as read-only memory-mapped arrays"""
+        if self._arrays is None:
+            with self.lock:
+                self._refresh()
+                rows = self.meta["rows"]
+                self._arrays = {
+                    name: (np.memmap(self._path(name), dtype=dtype, mode='r', shape=(rows,))
+                           if rows else np.empty(0, dtype=dtype))
+                    for name, dtype in COLUMNS.items()
+                }
+        return self._arrays
+
+    def totals(self, start=None, end=None):
+        """Count and sum income and expenses, optionally within [start, end)"""
+        columns = self.arrays()
+        mask = self._range_mask(start, end)
+        income_mask = mask & (columns["type"] == self._code("types", "income"))
+        return {
+            "count": int(mask.sum()),
+            "income": int(columns["amount"][income_mask].sum()) / 100,
+            "expenses": int(columns["amount"][mask & ~income_mask].sum()) / 100
+        }
+
+    def category_totals(self, start, end, transaction_type='expense'):
+        """Sum amounts per category within [start, end), largest first"""
+        columns = self.arrays()
+        mask = self._range_mask(start, end) & (columns["type"] == self._code("types", transaction_type))
+        sums = np.zeros(len(self.meta["categories"]), dtype=np.int64)
+        np.add.at(sums, columns["category"][mask], columns["amount"][mask])
+        order = np.argsort(-sums, kind='stable')
+        present = np.bincount(columns["category"][mask], minlength=len(self.meta["categories"]))
+        return [
+            (self.meta["categories"][code], int(sums[code]) / 100)
+            for code in order if present[code]
+        ]
+
+    def _range_mask(self, start, end):
+        columns = self.arrays()
+        mask = columns["live"].astype(bool)
+        if start is not None and end is not None:
+            dates = columns["date"]
+            mask &= (dates >= date_to_day(start)) & (dates < date_to_day(end))
+        return mask
+
+    def _refresh(self):
+        """Re-read meta.json if another process has replaced it"""
+        signature = file_signature(self.meta_path)
+        if signature is None or signature == self._meta_signature:
+            return
+        with open(self.meta_path, 'r') as f:
+            saved = json.load(f)
+        self.meta = saved if saved.get("format") == FORMAT else self._empty_meta()
+        self._meta_signature = signature
+        self._arrays = None
+        self._rows_by_id = None
+
+    @staticmethod
+    def _empty_meta():
+        return {"format": FORMAT, "rows": 0, "types": [], "categories": [], "signature": None}
+
+    def _code(self, kind, value):
+        values = self.meta[kind]
+        return values.index(value) if value in values else -1
+
+    def _intern(self, kind, value):
+        values = self.meta[kind]
+        if value not in values:
+            values.append(value)
+        return values.index(value)
+
+    def _append_rows(self, transactions):
+        if not transactions:
+            return
+        start_row = self.meta["rows"]
+        columns = {
+            "id": np.array([t.id for t in transactions], dtype=COLUMNS["id"]),
+            "amount": np.array([t.cents for t in transactions], dtype=COLUMNS["amount"]),
+            "date": np.array([t.day for t in transactions], dtype=COLUMNS["date"]),
+            "type": np.array([self._intern("types", t.type) for t in transactions], dtype=COLUMNS["type"]),
+            "category": np.array([self._intern("categories", t.category) for t in transactions],
+                                 dtype=COLUMNS["category"]),
+            "live": np.ones(len(transactions), dtype=COLUMNS["live"]),
+        }
+        for name, values in columns.items():
+            # Write at the row count recorded in meta.json rather than at the
+            # end of the file, so bytes left behind by an interrupted append
+            # are overwritten instead of shifting every later row.
+            path = self._path(name)
+            with open(path, 'r+b' if os.path.exists(path) else 'wb') as f:
+                f.seek(start_row * values.itemsize)
+                f.write(values.tobytes())
+                f.truncate()
+
+        if self._rows_by_id is not None:
+            for offset, transaction in enumerate(transactions):
+                self._rows_by_id[transaction.id] = start_row + offset
+        self.meta["rows"] += len(transactions)
+        self._arrays = None
+
+    def _kill(self, transaction_id):
+        row = self._row_of(transaction_id)
+        if row is None:
+            return
+        live = np.memmap(self._path("live"), dtype=COLUMNS["live"], mode='r+', shape=(self.meta["rows"],))
+        live[row] = 0
+        live.flush()
+        del self._rows_by_id[transaction_id]
+
+    def _row_of(self, transaction_id):
+        if self._rows_by_id is None:
+            columns = self.arrays()
+            live_rows = np.flatnonzero(columns["live"])
+            self._rows_by_id = {
+                key.decode(): int(row) for key, row in zip(columns["id"][live_rows], live_rows)
+            }
+        return self._rows_by_id.get(transaction_id)
+
+    def _save_meta(self, signature):
+        self.meta["signature"] = _normalize(signature)
+        tmp_path = f"{self.meta_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.meta, f)
+        os.replace(tmp_path, self.meta_path)
+        self._meta_signature = file_signature(self.meta_path)
+
+    def _path(self, name):
+        return os.path.join(self.directory, f"{name}.{COLUMNS[name]}")
+
+
+class _JSONListener:
+    """Base for aggregates persisted as a JSON file next to the ledger
+
+    To keep writes cheap the file is saved every ``flush_every`` changes and
+    at interpreter exit; if the process dies in between, the stale signature
+    makes the next start rebuild it.  Subclasses hold their state in
+    ``self.state`` and implement ``_add(transaction, sign)``; amounts are
+    kept as integer cents so the sums are exact.  The file is written under
+    ``lock`` (the storage's lock), since other processes save it too.
+    """
+
+    def __init__(self, path, flush_every=50, lock=None):
+        self.path = path
+        self.flush_every = flush_every
+        self.lock = lock or threading.RLock()
+        self.state = {}
+        self.signature = None
+        self._pending = 0
+        saved = self._load()
+        if saved.get("format") == FORMAT and "state" in saved:
+            self.state = saved["state"]
+            self.signature = saved.get("signature")
+        atexit.register(self.flush)
+
+    def sync(self, ledger, signature):
+        """Rebuild if the saved state does not reflect the given storage state"""
+        if self.signature != _normalize(signature):
+            self.rebuild(ledger, signature)
+
+    def rebuild(self, transactions, signature):
+        """Recompute from scratch"""
+        self.state = {}
+        for transaction in transactions:
+            self._add(transaction, 1)
+        self.signature = _normalize(signature)
+        self._save()
+
+    def apply(self, change, ledger, previous, old_signature, new_signature):
+        """Update for a single ledger change, if in sync before it"""
+        if self.signature != _normalize(old_signature):
+            return
+
+        op = change[0]
+        if op == "add":
+            self._add(change[1], 1)
+        elif op == "add_many":
+            for transaction in change[1]:
+                self._add(transaction, 1)
+        elif op == "delete":
+            self._add(previous, -1)
+        elif op == "update":
+            self._add(previous, -1)
+            self._add(ledger.get(change[1]), 1)
+        else:
+            self.rebuild(ledger, new_signature)
+            return
+
+        self.signature = _normalize(new_signature)
+        self._pending += 1
+        if self._pending >= self.flush_every:
+            self._save()
+
+    def flush(self):
+        """Save pending changes"""
+        if self._pending:
+            self._save()
+
+    def close(self):
+        """Save pending changes and stop saving at exit
+
+        Called when the store is replaced, so a discarded instance cannot
+        overwrite its successor's file with older state at exit.
+        """
+        atexit.unregister(self.flush)
+        self.flush()
+
+    def _add(self, transaction, sign):
+        raise NotImplementedError
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as f:
+                saved = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            # A truncated or garbled file is only a cache; rebuild it
+            logger.warning("Rebuilding unreadable %s: %s", self.path, e)
+            return {}
+        return saved if isinstance(saved, dict) else {}
+
+    def _save(self):
+        directory, name = os.path.split(self.path)
+        with self.lock:
+            fd, tmp_path = tempfile.mkstemp(prefix=f"{name}.", suffix=".tmp", dir=directory or ".")
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump({"format": FORMAT, "signature": self.signature, "state": self.state}, f)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        self._pending = 0
+
+
+class MonthlyRollup(_JSONListener):
+    """Sums and counts keyed by (year-month, type, category)"""
+
+    def month(self, year, month):
+        """Return {type: {category: [amount, count]}} for one month"""
+        return {
+            transaction_type: {
+                category: [cents / 100, count] for category, (cents, count) in categories.items()
+            }
+            for transaction_type, categories in self.state.get(f"{year}-{month:02d}", {}).items()
+        }
+
+    def _add(self, transaction, sign):
+        key = transaction.date[:7]
+        transaction_type = transaction.type
+        category = transaction.category
+        categories = self.state.setdefault(key, {}).setdefault(transaction_type, {})
+        entry = categories.setdefault(category, [0, 0])
+        entry[0] += sign * transaction.cents
+        entry[1] += sign
+        if entry[1] == 0:
+            del categories[category]
+            if not categories:
+                del self.state[key][transaction_type]
+                if not self.state[key]:
+                    del self.state[key]
+
+
+def period_key(period, date):
+    """Key of the period containing a 'YYYY-MM-DD' date
+
+    ``period`` is 'all', 'year', 'quarter' or 'month'; keys look like
+    'all', '2025', '2025-Q4' and '2025-10'.
+    """
+    if period == 'all':
+        return 'all'
+    if period == 'year':
+        return date[:4]
+    if period == 'quarter':
+        return f"{date[:4]}-Q{(int(date[5:7]) - 1) // 3 + 1}"
+    if period == 'month':
+        return date[:7]
+    raise ValueError(f"Unknown period: {period}")
+
+
+class RunningTotals(_JSONListener):
+    """Income, expense and count totals for the whole ledger and per period
+
+    Each transaction contributes to four keys (see ``period_key``), so a
+    total for any year, quarter or month is a single lookup.
+    """
+
+    PERIODS = ('all', 'year', 'quarter', 'month')
+
+    def totals(self, key):
+        """Return {"count", "income", "expenses"} for a period key"""
+        income, expenses, count = self.state.get(key, (0, 0, 0))
+        return {"count": count, "income": income / 100, "expenses": expenses / 100}
+
+    def _add(self, transaction, sign):
+        amount = sign * transaction.cents
+        is_income = transaction.type == "income"
+        date = transaction.date
+        for period in self.PERIODS:
+            key = period_key(period, date)
+            entry = self.state.setdefault(key, [0, 0, 0])
+            entry[0 if is_income else 1] += amount
+            entry[2] += sign
+            if entry[2] == 0:
+                del self.state[key]
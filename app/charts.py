@@ -0,0 +1,168 @@
+"""
+Chart rendering for Budget Tracker
+
+Charts are drawn with matplotlib's object-oriented ``Figure`` API, which
+keeps no global state, so renders are safe to run from several threads.
+``ChartRenderer`` runs them in a bounded pool of worker processes, so
+concurrent chart requests use every core and never block a request thread
+for longer than the configured timeout.
+"""
+import atexit
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+from matplotlib import colormaps
+from matplotlib.figure import Figure
+from PIL import Image
+
+
+def render_category_chart(year, month, category_spending, fmt='png', figsize=(10, 6), dpi=100):
+    """Render a pie chart of (category, amount) pairs as image bytes"""
+    labels = [category for category, _ in category_spending]
+    values = [amount for _, amount in category_spending]
+
+    fig = Figure(figsize=figsize)
+    ax = fig.add_subplot()
+    colors = colormaps['Set3'](range(len(values)))
+    ax.pie(values, labels=labels, autopct='%1.1f%%',
+           startangle=90, colors=colors)
+    ax.set_title(f'Category-wise Spending - {year}-{month:02d}', fontsize=14, fontweight='bold')
+    fig.tight_layout()
+    return _save(fig, fmt, dpi)
+
+
+def render_income_vs_expense_chart(year, month, amounts, fmt='png', figsize=(8, 5), dpi=100):
+    """Render a bar chart of [income, expenses] as image bytes"""
+    fig = Figure(figsize=figsize)
+    ax = fig.add_subplot()
+    bars = ax.bar(['Income', 'Expenses'], amounts, color=['#2ecc71', '#e74c3c'], width=0.5)
+    ax.set_ylabel('Amount ($)', fontsize=12)
+    ax.set_title(f'Income vs Expenses - {year}-{month:02d}', fontsize=14, fontweight='bold')
+    ax.grid(axis='y', alpha=0.3)
+
+    for bar, amount in zip(bars, amounts):
+        ax.text(bar.get_x() + bar.get_width() / 2., bar.get_height(),
+                f'${amount:.2f}', ha='center', va='bottom', fontweight='bold')
+
+    fig.tight_layout()
+    return _save(fig, fmt, dpi)
+
+
+RENDERERS = {
+    'category': render_category_chart,
+    'income-vs-expense': render_income_vs_expense_chart,
+}
+
+
+def render_chart(chart, *args):
+    """Render a chart by name; runs in the worker processes"""
+    return RENDERERS[chart](*args)
+
+
+def sprite_sheet(rows):
+    """Paste rows of PNG images into one PNG grid
+
+    ``rows`` is a list of lists of PNG bytes or None for an empty cell.
+    Every cell is as large as the largest image, which is centered in it.
+    """
+    images = [[Image.open(BytesIO(png)) if png else None for png in row] for row in rows]
+    present = [image for row in images for image in row if image is not None]
+    cell_width = max(image.width for image in present)
+    cell_height = max(image.height for image in present)
+    columns = max(len(row) for row in images)
+
+    sheet = Image.new('RGB', (cell_width * columns, cell_height * len(images)), 'white')
+    for y, row in enumerate(images):
+        for x, image in enumerate(row):
+            if image is not None:
+                sheet.paste(image, (x * cell_width + (cell_width - image.width) // 2,
+                                    y * cell_height + (cell_height - image.height) // 2))
+    img = BytesIO()
+    sheet.save(img, format='png')
+    return img.getvalue()
+
+
+def _save(fig, fmt, dpi):
+    img = BytesIO()
+    fig.savefig(img, format=fmt, dpi=dpi, bbox_inches='tight')
+    return img.getvalue()
+
+
+class ChartRenderer:
+    """Bounded process pool for chart renders
+
+    At most ``workers + queue_size`` renders are in flight at once.  A
+    render raises ``TimeoutError`` if it waits more than ``timeout`` seconds
+    for a slot, or again that long for its result.  With ``workers=0``
+    charts are rendered in the calling thread.  Workers are started with
+    'spawn' so they never inherit locks held by the server's other threads.
+    """
+
+    def __init__(self, workers=0, queue_size=16, timeout=30.0):
+        self.lock = threading.Lock()
+        self._executor = None
+        self.configure(workers, queue_size, timeout)
+        atexit.register(self.shutdown)
+
+    def configure(self, workers, queue_size, timeout):
+        """Resize the pool; running renders finish on the old one"""
+        self.shutdown()
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+
+    def render(self, chart, *args):
+        """Render a chart by name and return the image bytes"""
+        return self.render_many([(chart, *args)])[0]
+
+    def render_many(self, jobs):
+        """Render (chart, *args) jobs, spread over the pool, and return their images in order"""
+        if not self.workers:
+            return [render_chart(*job) for job in jobs]
+        futures = [self._submit(job) for job in jobs]
+        return [self._result(future) for future in futures]
+
+    def shutdown(self):
+        """Stop the worker processes without waiting for running renders"""
+        with self.lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, job):
+        slots = self._slots
+        if not slots.acquire(timeout=self.timeout):
+            raise TimeoutError("Chart renderer is busy, try again later")
+        try:
+            future = self._pool().submit(render_chart, *job)
+        except BaseException:
+            slots.release()
+            raise
+        # The slot is held until the render ends, even if the caller gives
+        # up waiting, so stuck renders cannot pile up behind the pool
+        future.add_done_callback(lambda _: slots.release())
+        return future
+
+    def _result(self, future):
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise TimeoutError("Chart rendering timed out") from None
+        except BrokenProcessPool:
+            # A worker died; start a fresh pool for the next render
+            self.shutdown()
+            raise
+
+    def _pool(self):
+        with self.lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._executor
+
+
+chart_renderer = ChartRenderer()
@@ -0,0 +1,75 @@
+"""
+Command line commands for Budget Tracker
+
+Run with ``flask --app run <command>``.
+"""
+import click
+from flask import current_app
+from app.importer import FORMATS, detect_format, import_transactions
+from app.storage import migrate_json_to_shards, migrate_json_to_sqlite
+from app.utils import export_year_charts
+
+
+def register_commands(app):
+    """Register CLI commands on the Flask app"""
+    app.cli.add_command(migrate_sqlite)
+    app.cli.add_command(migrate_shards)
+    app.cli.add_command(import_file)
+    app.cli.add_command(year_charts)
+
+
+@click.command('migrate-sqlite')
+@click.option('--source', default=None, help='JSON ledger to read (defaults to DATA_FILE).')
+@click.option('--target', default=None, help='SQLite database to write (defaults to SQLITE_FILE).')
+def migrate_sqlite(source, target):
+    """Copy the JSON ledger into the SQLite backend"""
+    source = source or current_app.config['DATA_FILE']
+    target = target or current_app.config['SQLITE_FILE']
+    count = migrate_json_to_sqlite(source, target)
+    click.echo(f"✓ Migrated {count} transactions from {source} to {target}")
+    click.echo("Set BUDGET_STORAGE_BACKEND=sqlite to use it.")
+
+
+@click.command('migrate-shards')
+@click.option('--source', default=None, help='JSON ledger to read (defaults to DATA_FILE).')
+@click.option('--target', default=None, help='Shard directory to write (defaults to SHARD_DIR).')
+def migrate_shards(source, target):
+    """Split the JSON ledger into per-month shards"""
+    source = source or current_app.config['DATA_FILE']
+    target = target or current_app.config['SHARD_DIR']
+    count = migrate_json_to_shards(source, target)
+    click.echo(f"✓ Migrated {count} transactions from {source} to {target}")
+    click.echo("Set BUDGET_STORAGE_BACKEND=sharded to use it.")
+
+
+@click.command('import')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(FORMATS), default=None,
+              help='File format (detected from the extension by default).')
+@click.option('--chunk-size', type=int, default=None, help='Rows validated and committed at a time.')
+def import_file(path, fmt, chunk_size):
+    """Import transactions from a CSV or JSON-lines file"""
+    with open(path, 'rb') as f:
+        summary = import_transactions(
+            f, fmt or detect_format(path), chunk_size or current_app.config['IMPORT_CHUNK_SIZE']
+        )
+    click.echo(f"✓ Imported {summary['imported']} transactions "
+               f"({summary['duplicates']} duplicates, {summary['invalid']} invalid rows skipped)")
+    for error in summary["errors"]:
+        click.echo(f"  row {error['row']}: {error['message']}")
+
+
+@click.command('year-charts')
+@click.argument('year', type=int)
+@click.option('--layout', type=click.Choice(['zip', 'sprite']), default='zip',
+              help='A zip of PNG files or a single PNG sprite sheet.')
+@click.option('--output', default=None, help='File to write (defaults to charts_YEAR.zip or .png).')
+def year_charts(year, layout, output):
+    """Render every monthly chart of a year in one pass"""
+    content = export_year_charts(year, layout)
+    if content is None:
+        raise click.ClickException(f"No transactions found for {year}")
+    output = output or f"charts_{year}.{'png' if layout == 'sprite' else 'zip'}"
+    with open(output, 'wb') as f:
+        f.write(content)
+    click.echo(f"✓ Wrote {output}")
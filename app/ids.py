@@ -0,0 +1,52 @@
+"""
+Transaction identifiers for Budget Tracker
+"""
+import os
+import threading
+import time
+
+_CROCKFORD = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_PAIRS = [first + second for first in _CROCKFORD for second in _CROCKFORD]
+_lock = threading.Lock()
+_last = (0, 0)
+
+
+def new_transaction_id():
+    """Generate a ULID: 26 characters, unique and sortable by creation time
+
+    IDs generated within the same millisecond increment the random part, so
+    they stay strictly increasing within a process.
+    """
+    return new_transaction_ids(1)[0]
+
+
+def new_transaction_ids(count):
+    """Generate count consecutive ULIDs, reserving them under one lock"""
+    global _last
+    with _lock:
+        timestamp = time.time_ns() // 1_000_000
+        last_timestamp, last_randomness = _last
+        if timestamp <= last_timestamp:
+            timestamp, randomness = last_timestamp, last_randomness + 1
+        else:
+            # 79 random bits leave headroom to count up within the 80-bit field
+            randomness = int.from_bytes(os.urandom(10), 'big') >> 1
+        _last = (timestamp, randomness + count - 1)
+
+    base = (timestamp << 80) | randomness
+    return [_encode(base + offset) for offset in range(count)]
+
+
+def _encode(value):
+    # Two Crockford characters (10 bits) per lookup
+    return ''.join([_PAIRS[(value >> shift) & 1023] for shift in range(120, -1, -10)])
+
+
+def assign_missing_ids(transactions):
+    """Give every transaction without an id a new one; return True if any changed"""
+    changed = False
+    for transaction in transactions:
+        if not transaction.get("id"):
+            transaction["id"] = new_transaction_id()
+            changed = True
+    return changed
@@ -0,0 +1,189 @@
+"""
+Bulk import of bank exports for Budget Tracker
+
+Files are read with pandas in chunks, so memory is bounded by the chunk
+size rather than the file size.  Each chunk is validated with vectorized
+column operations, checked for duplicates by content hash and committed
+to storage in a single write.
+"""
+import numpy as np
+import pandas as pd
+from app.ids import new_transaction_ids
+from app.models import BudgetDatabase, Transaction, to_cents
+
+FORMATS = ('csv', 'jsonl')
+
+REQUIRED_COLUMNS = ("amount", "category", "date")
+
+# Columns that define a transaction's content for duplicate detection
+KEY_COLUMNS = ["type", "cents", "category", "description", "date"]
+
+# Amounts must be below this, so their cents stay exact as floats and
+# within int64 columns
+MAX_AMOUNT = 10 ** 13
+
+# Day ordinal of 1970-01-01, to turn datetime64 days into date.toordinal()
+EPOCH_ORDINAL = 719163
+
+MAX_REPORTED_ERRORS = 20
+
+
+def detect_format(filename=None, mimetype=None, default='csv'):
+    """Guess the import format from a file name or MIME type"""
+    name = (filename or "").lower()
+    if name.endswith(('.jsonl', '.ndjson', '.json')) or (mimetype or "").endswith(('ndjson', 'jsonl', 'json')):
+        return 'jsonl'
+    if name.endswith('.csv') or mimetype == 'text/csv':
+        return 'csv'
+    return default
+
+
+def read_chunks(source, fmt='csv', chunk_size=10000):
+    """Return an iterator of DataFrames of at most chunk_size rows"""
+    if fmt == 'csv':
+        return pd.read_csv(source, chunksize=chunk_size, dtype=str, keep_default_na=False,
+                           skipinitialspace=True)
+    if fmt == 'jsonl':
+        return pd.read_json(source, lines=True, chunksize=chunk_size, dtype=False, convert_dates=False)
+    raise ValueError(f"Unknown import format: {fmt}")
+
+
+def validate_chunk(chunk):
+    """Validate a chunk of raw rows
+
+    Returns the valid rows normalized to ``KEY_COLUMNS`` (amounts as integer
+    cents) plus a ``day`` ordinal column, and a Series with an error message
+    for every invalid row.  Files without a ``type`` column are treated as
+    signed bank exports, where negative amounts are expenses.
+    """
+    chunk = chunk.rename(columns=lambda column: str(column).strip().lower())
+    missing = [column for column in REQUIRED_COLUMNS if column not in chunk]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+
+    amount = pd.to_numeric(chunk["amount"], errors='coerce')
+    if "type" in chunk:
+        kind = chunk["type"].fillna("").astype(str).str.strip().str.lower()
+    else:
+        kind = pd.Series(np.where(amount < 0, "expense", "income"), index=chunk.index)
+        amount = amount.abs()
+    dates = pd.to_datetime(chunk["date"].fillna("").astype(str).str.strip(), format='%Y-%m-%d', errors='coerce')
+    category = chunk["category"].fillna("").astype(str).str.strip()
+    if "description" in chunk:
+        description = chunk["description"].fillna("").astype(str).str.strip()
+    else:
+        description = pd.Series("", index=chunk.index)
+
+    checks = [
+        (~kind.isin(["income", "expense"]), "type must be 'income' or 'expense'"),
+        (amount.isna() | (amount < 0), "amount must be a non-negative number"),
+        (~np.isfinite(amount) | (amount >= MAX_AMOUNT), "amount is out of range"),
+        (dates.isna(), "date must be YYYY-MM-DD"),
+        (category == "", "category is required"),
+    ]
+    invalid = np.logical_or.reduce([mask.to_numpy() for mask, _ in checks])
+    errors = pd.Series(
+        np.select([mask.to_numpy() for mask, _ in checks], [message for _, message in checks], ""),
+        index=chunk.index
+    )[invalid]
+
+    valid = ~invalid
+    # Rounded by to_cents, as amounts added through the API are, so the
+    # content hashes of equal transactions match
+    rows = _key_frame(
+        kind[valid], amount[valid].map(to_cents), category[valid],
+        description[valid], dates[valid].dt.strftime('%Y-%m-%d')
+    )
+    rows["day"] = dates[valid].to_numpy().astype('datetime64[D]').astype('int64') + EPOCH_ORDINAL
+    return rows, errors
+
+
+def content_hashes(rows):
+    """Return a 64-bit content hash for every row of a ``KEY_COLUMNS`` frame"""
+    return pd.util.hash_pandas_object(rows[KEY_COLUMNS], index=False).to_numpy()
+
+
+def ledger_hashes(chunk_size=10000):
+    """Count the content hashes of the transactions already in the ledger
+
+    The ledger is read one page at a time.  Returns the distinct hashes,
+    sorted, and how many transactions have each.
+    """
+    pages = []
+    cursor = None
+    while True:
+        page = BudgetDatabase.query_transactions(limit=chunk_size, cursor=cursor)
+        if page["transactions"]:
+            df = pd.DataFrame(page["transactions"])
+            rows = _key_frame(
+                df["type"], df["amount"].map(to_cents), df["category"],
+                df["description"].fillna("") if "description" in df else "", df["date"]
+            )
+            pages.append(content_hashes(rows))
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    if not pages:
+        return np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.int64)
+    return np.unique(np.concatenate(pages), return_counts=True)
+
+
+def import_transactions(source, fmt='csv', chunk_size=10000):
+    """Import transactions from a CSV or JSON-lines file-like object
+
+    A row is a duplicate if the ledger already holds a transaction with the
+    same type, amount, category, description and date.  Duplicates are
+    counted per occurrence, so re-importing an overlapping export skips the
+    rows already imported while two identical purchases within one export
+    are both kept.  Each chunk is committed as it is read; returns counts of
+    imported, duplicate and invalid rows with the first few row errors.
+    """
+    known, remaining = ledger_hashes(chunk_size)
+    summary = {"imported": 0, "duplicates": 0, "invalid": 0, "errors": []}
+    row_offset = 0
+
+    for chunk in read_chunks(source, fmt, chunk_size):
+        chunk.index = pd.RangeIndex(row_offset + 1, row_offset + 1 + len(chunk))
+        row_offset += len(chunk)
+        rows, errors = validate_chunk(chunk)
+
+        summary["invalid"] += len(errors)
+        for row, message in errors.items():
+            if len(summary["errors"]) >= MAX_REPORTED_ERRORS:
+                break
+            summary["errors"].append({"row": int(row), "message": message})
+
+        # Only rows whose hash is already in the ledger are tracked; each
+        # uses up one of the matching ledger transactions
+        hashes = content_hashes(rows)
+        keep = np.ones(len(rows), dtype=bool)
+        if len(known):
+            positions = np.minimum(np.searchsorted(known, hashes), len(known) - 1)
+            for row in np.flatnonzero(known[positions] == hashes):
+                position = positions[row]
+                if remaining[position] > 0:
+                    remaining[position] -= 1
+                    keep[row] = False
+        rows = rows[keep]
+        summary["duplicates"] += len(keep) - len(rows)
+
+        BudgetDatabase.add_transactions([
+            Transaction.from_parts(transaction_id, kind, cents, category, description, day)
+            for transaction_id, (kind, cents, category, description, day) in zip(
+                new_transaction_ids(len(rows)),
+                rows[["type", "cents", "category", "description", "day"]].itertuples(index=False)
+            )
+        ])
+        summary["imported"] += len(rows)
+
+    return summary
+
+
+def _key_frame(kind, cents, category, description, date):
+    """Build a frame with uniform dtypes so hashes match across sources"""
+    frame = pd.DataFrame({
+        "type": kind, "cents": cents, "category": category, "description": description, "date": date
+    })
+    return frame.astype({
+        "type": object, "cents": "int64", "category": object, "description": object, "date": object
+    })
@@ -1,24 +1,218 @@
 """
 Data models and database operations for Budget Tracker
 """
+import base64
+import hashlib
 import json
-import os
-from datetime import datetime
+import logging
+import threading
+from bisect import bisect_left, bisect_right, insort
+from itertools import islice
+from datetime import date as date_cls, datetime
+from app.ids import assign_missing_ids, new_transaction_id
+from app.money import from_cents, to_cents
+from app.storage import JSONStorage, create_storage
 
 DATA_FILE = "budget_data.json"
 
+logger = logging.getLogger(__name__)
+
+_storage = JSONStorage(DATA_FILE)
+_analytics = None
+_rollup = None
+_totals = None
+
+def month_bounds(year, month):
+    """Return the [start, end) date strings covering a month"""
+    start = f"{year}-{month:02d}-01"
+    if month == 12:
+        end = f"{year + 1}-01-01"
+    else:
+        end = f"{year}-{month + 1:02d}-01"
+    return start, end
+
+def period_bounds(period, date):
+    """Return the [start, end) date strings of the period containing a date
+
+    ``period`` is 'all', 'year', 'quarter' or 'month'; 'all' has no bounds.
+    """
+    year, month = int(date[:4]), int(date[5:7])
+    if period == 'all':
+        return None, None
+    if period == 'year':
+        return f"{year}-01-01", f"{year + 1}-01-01"
+    if period == 'quarter':
+        first = (month - 1) // 3 * 3 + 1
+        start = f"{year}-{first:02d}-01"
+        return start, month_bounds(year, first + 2)[1]
+    if period == 'month':
+        return month_bounds(year, month)
+    raise ValueError(f"Unknown period: {period}")
+
+def date_to_ordinal(date):
+    """Convert a 'YYYY-MM-DD' string to a proleptic Gregorian day number
+
+    Dates without zero padding, such as '2025-1-5' in older ledgers, are
+    accepted too.
+    """
+    try:
+        return date_cls.fromisoformat(date[:10]).toordinal()
+    except ValueError:
+        pass
+    try:
+        return datetime.strptime(date.split("T")[0].split(" ")[0], "%Y-%m-%d").toordinal()
+    except ValueError:
+        raise ValueError(f"Invalid date: {date}") from None
+
+def normalize_date(date):
+    """Return a date string in 'YYYY-MM-DD' form, zero-padding it if needed
+
+    Storage compares and partitions dates as strings, so every date that
+    reaches it goes through here first.
+    """
+    return date_cls.fromordinal(date_to_ordinal(date)).isoformat()
+
+# Orders GET /api/transactions can page through; each has a sort index
+SORT_ORDERS = ("date", "amount")
+
+def encode_cursor(sort, descending, transaction):
+    """Return an opaque cursor pointing just past a transaction in a sort order"""
+    value = transaction["date"] if sort == "date" else to_cents(transaction["amount"])
+    raw = json.dumps([sort, descending, value, transaction["id"]], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor, sort, descending):
+    """Return the (date or cents, id) key held by a cursor
+
+    Raises ValueError if the cursor is malformed or was issued for a
+    different sort order.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort, cursor_descending, value, transaction_id = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor") from None
+    if (cursor_sort, cursor_descending) != (sort, descending):
+        raise ValueError("Cursor does not match the requested sort order")
+    if not isinstance(transaction_id, str) or not isinstance(value, str if sort == "date" else int):
+        raise ValueError("Invalid cursor")
+    return value, transaction_id
+
+def _filter_checks(filters):
+    """Build a list of per-transaction checks for query filters"""
+    checks = []
+    if "start" in filters:
+        start_day = date_to_ordinal(filters["start"])
+        checks.append(lambda t: t.day >= start_day)
+    if "end" in filters:
+        end_day = date_to_ordinal(filters["end"])
+        checks.append(lambda t: t.day < end_day)
+    if "type" in filters:
+        transaction_type = filters["type"]
+        checks.append(lambda t: t.type == transaction_type)
+    if "category" in filters:
+        category = filters["category"]
+        checks.append(lambda t: t.category == category)
+    if "min_cents" in filters:
+        min_cents = filters["min_cents"]
+        checks.append(lambda t: t.cents >= min_cents)
+    if "max_cents" in filters:
+        max_cents = filters["max_cents"]
+        checks.append(lambda t: t.cents <= max_cents)
+    return checks
+
+class Codebook:
+    """Interns repeated strings (types, categories) as small integer codes"""
+    def __init__(self):
+        self.values = []
+        self._codes = {}
+
+    def code(self, value):
+        """Return the code for a value, assigning one if needed"""
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+TYPE_CODES = Codebook()
+CATEGORY_CODES = Codebook()
+
 class Transaction:
-    """Transaction model"""
-    def __init__(self, transaction_type, amount, category, description, date=None):
-        self.type = transaction_type
-        self.amount = float(amount)
-        self.category = category
+    """Transaction model
+
+    Stored compactly: the amount as integer cents, the date as a day
+    ordinal and the type and category as interned codes.  The public
+    attributes (``amount``, ``date``, ``type``, ``category``) convert back
+    on access, and ``to_dict()`` builds the API representation.
+    """
+    EDITABLE_FIELDS = ("type", "amount", "category", "description", "date")
+
+    __slots__ = ("id", "cents", "day", "type_code", "category_code", "description")
+
+    def __init__(self, transaction_type, amount, category, description, date=None, transaction_id=None):
+        self.id = transaction_id or new_transaction_id()
+        self.cents = to_cents(amount)
+        self.day = date_to_ordinal(date or datetime.now().strftime("%Y-%m-%d"))
+        self.type_code = TYPE_CODES.code(transaction_type)
+        self.category_code = CATEGORY_CODES.code(category)
         self.description = description
-        self.date = date or datetime.now().strftime("%Y-%m-%d")
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a transaction from its dictionary form"""
+        return cls(data["type"], data["amount"], data["category"], data.get("description", ""),
+                   data["date"], data.get("id"))
+
+    @classmethod
+    def from_parts(cls, transaction_id, transaction_type, cents, category, description, day):
+        """Build a transaction from already normalized cents and day ordinal"""
+        transaction = cls.__new__(cls)
+        transaction.id = transaction_id
+        transaction.cents = cents
+        transaction.day = day
+        transaction.type_code = TYPE_CODES.code(transaction_type)
+        transaction.category_code = CATEGORY_CODES.code(category)
+        transaction.description = description
+        return transaction
+
+    @property
+    def type(self):
+        return TYPE_CODES.values[self.type_code]
+
+    @property
+    def category(self):
+        return CATEGORY_CODES.values[self.category_code]
+
+    @property
+    def amount(self):
+        return from_cents(self.cents)
+
+    @property
+    def date(self):
+        return date_cls.fromordinal(self.day).isoformat()
+
+    @staticmethod
+    def validate_changes(changes):
+        """Check and normalize a partial update"""
+        unknown = set(changes) - set(Transaction.EDITABLE_FIELDS)
+        if unknown:
+            raise ValueError(f"Cannot update fields: {', '.join(sorted(unknown))}")
+        changes = dict(changes)
+        if "amount" in changes:
+            changes["amount"] = from_cents(to_cents(changes["amount"]))
+        if "date" in changes:
+            changes["date"] = normalize_date(changes["date"])
+        return changes
+
+    def updated(self, changes):
+        """Return a copy of this transaction with changes applied"""
+        return Transaction.from_dict({**self.to_dict(), **changes})
 
     def to_dict(self):
         """Convert transaction to dictionary"""
         return {
+            "id": self.id,
             "type": self.type,
             "amount": self.amount,
             "category": self.category,
@@ -26,31 +220,395 @@ class Transaction:
             "date": self.date
         }
 
+class Ledger:
+    """In-memory ledger with an id -> transaction index
+
+    Transactions are kept in insertion order in a dict keyed by id, so
+    lookups, deletes and updates by id are constant time.  Sorted lists of
+    (day, id) and (cents, id) keys are built on the first query that needs
+    them and kept up to date afterwards, so date and amount ranges and
+    cursor positions are found with bisect.
+    """
+    # Sort indexes: name -> key of a transaction within the index
+    INDEXES = {
+        "date": lambda t: (t.day, t.id),
+        "amount": lambda t: (t.cents, t.id),
+    }
+
+    def __init__(self, transactions=()):
+        self.replace(transactions)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records.values())
+
+    def __contains__(self, transaction_id):
+        return transaction_id in self.records
+
+    def transactions(self):
+        """Return the transactions as a new list of dictionaries"""
+        return [t.to_dict() for t in self.records.values()]
+
+    def get(self, transaction_id):
+        """Return a transaction by id, or None"""
+        return self.records.get(transaction_id)
+
+    def id_at(self, index):
+        """Return the id of the transaction at an insertion position, or None"""
+        if 0 <= index < len(self.records):
+            return next(islice(self.records, index, None))
+        return None
+
+    def between(self, start, end):
+        """Return transactions with start <= date < end, ordered by date"""
+        keys = self._sorted_keys()
+        lo = bisect_left(keys, (date_to_ordinal(start),))
+        hi = bisect_left(keys, (date_to_ordinal(end),), lo)
+        return [self.records[transaction_id] for _, transaction_id in keys[lo:hi]]
+
+    def latest(self, limit):
+        """Return the last transactions by date, newest first"""
+        keys = self._sorted_keys()
+        return [self.records[transaction_id] for _, transaction_id in reversed(keys[max(len(keys) - limit, 0):])]
+
+    def page(self, filters, sort, descending, after, limit):
+        """Return up to limit transactions matching filters, in index order
+
+        ``after`` is the index key of the last row of the previous page, or
+        None for the first page.  The index bounds the scan by its own range
+        filter (dates or amounts); the other filters are checked per row.
+        """
+        keys = self._sorted_keys(sort)
+        if sort == "date":
+            low = (date_to_ordinal(filters["start"]),) if "start" in filters else None
+            high = (date_to_ordinal(filters["end"]),) if "end" in filters else None
+        else:
+            low = (filters["min_cents"],) if "min_cents" in filters else None
+            high = (filters["max_cents"] + 1,) if "max_cents" in filters else None
+        lo = bisect_left(keys, low) if low else 0
+        hi = bisect_left(keys, high, lo) if high else len(keys)
+        if after is not None:
+            if descending:
+                hi = min(hi, bisect_left(keys, after, lo))
+            else:
+                lo = max(lo, bisect_right(keys, after, lo))
+        positions = range(hi - 1, lo - 1, -1) if descending else range(lo, hi)
+
+        matches = _filter_checks(filters)
+        transactions = []
+        for position in positions:
+            transaction = self.records[keys[position][1]]
+            if all(check(transaction) for check in matches):
+                transactions.append(transaction)
+                if len(transactions) >= limit:
+                    break
+        return transactions
+
+    def add(self, transaction):
+        """Add a transaction"""
+        self.records[transaction.id] = transaction
+        for name, keys in self._indexes.items():
+            insort(keys, self.INDEXES[name](transaction))
+
+    def add_many(self, transactions):
+        """Add several transactions"""
+        for transaction in transactions:
+            self.records[transaction.id] = transaction
+        for name, keys in self._indexes.items():
+            keys.extend(map(self.INDEXES[name], transactions))
+            keys.sort()
+
+    def remove(self, transaction_id):
+        """Remove a transaction by id"""
+        transaction = self.records.pop(transaction_id, None)
+        if transaction is not None:
+            self._remove_keys(transaction)
+
+    def update(self, transaction_id, changes):
+        """Apply changes to a transaction by id"""
+        previous = self.records.get(transaction_id)
+        if previous is None:
+            return
+        transaction = self.records[transaction_id] = previous.updated(changes)
+        for name, keys in self._indexes.items():
+            key = self.INDEXES[name]
+            if key(previous) != key(transaction):
+                self._remove_key(keys, key(previous))
+                insort(keys, key(transaction))
+
+    def replace(self, transactions):
+        """Replace every transaction with ones built from dictionaries"""
+        self.records = {}
+        for data in transactions:
+            try:
+                transaction = Transaction.from_dict(data)
+            except (KeyError, TypeError, ValueError) as e:
+                # One malformed row in an old ledger must not stop the app
+                logger.warning("Skipping unreadable transaction %s: %s", data.get("id"), e)
+                continue
+            self.records[transaction.id] = transaction
+        self._indexes = {}
+
+    def apply(self, change):
+        """Apply a change tuple such as ("add", transaction) or ("delete", id)"""
+        op = change[0]
+        if op == "add":
+            self.add(change[1])
+        elif op == "add_many":
+            self.add_many(change[1])
+        elif op == "delete":
+            self.remove(change[1])
+        elif op == "update":
+            self.update(change[1], change[2])
+        elif op == "replace":
+            self.replace(change[1])
+
+    def _sorted_keys(self, name="date"):
+        keys = self._indexes.get(name)
+        if keys is None:
+            keys = self._indexes[name] = sorted(map(self.INDEXES[name], self.records.values()))
+        return keys
+
+    def _remove_keys(self, transaction):
+        for name, keys in self._indexes.items():
+            self._remove_key(keys, self.INDEXES[name](transaction))
+
+    @staticmethod
+    def _remove_key(keys, key):
+        position = bisect_left(keys, key)
+        if position < len(keys) and keys[position] == key:
+            del keys[position]
+
+class LedgerCache:
+    """Process-wide in-memory copy of the ledger
+
+    The cached data is reused until the storage signature (file inode, mtime and
+    size) changes or the version counter moves past the loaded version.
+    Writes made through this process are applied to the cached copy in
+    place, so they do not force a reload, and are passed on to every
+    listener so derived structures can be updated incrementally.
+    """
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.listeners = []
+        self.data = None
+        self.signature = None
+        self.version = 0
+        self.loaded_version = None
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, storage):
+        """Return the cached ledger, reloading it if storage has changed
+
+        A hit only compares signatures; the storage lock is taken on reload,
+        so the signature recorded is the one the loaded data was read at.
+        """
+        with self.lock:
+            if self._fresh(storage):
+                self.hits += 1
+                return self.data
+
+            with storage.lock:
+                self.misses += 1
+                self.data = Ledger(storage.load()["transactions"])
+                self.signature = storage.signature()
+                self.loaded_version = self.version
+                return self.data
+
+    def _fresh(self, storage):
+        return (self.data is not None and storage.signature() == self.signature
+                and self.loaded_version == self.version)
+
+    def write(self, storage, write, change):
+        """Run a storage write and mirror the change into the cached ledger
+
+        The storage lock is held from the freshness check until the new
+        signature is read, so a write from another process cannot slip in
+        between and be mistaken for this one.  The write is committed to
+        disk after the locks are released, letting concurrent writers share
+        one commit.
+        """
+        with self.lock, storage.lock:
+            # Backends that answer queries themselves are not mirrored, so
+            # bulk writes to them do not pile up in memory
+            fresh = not storage.native_queries and self._fresh(storage)
+            result = write()
+            if result is False:
+                return result
+
+            self.version += 1
+            if storage.native_queries:
+                self.data = None
+            elif fresh:
+                previous = self.data.get(change[1]) if change[0] in ("delete", "update") else None
+                self.data.apply(change)
+                signature = storage.signature()
+                for listener in self.listeners:
+                    listener.apply(change, self.data, previous, self.signature, signature)
+                self.signature = signature
+                self.loaded_version = self.version
+        storage.commit()
+        return result
+
+    def invalidate(self):
+        """Force the next read to reload from storage"""
+        with self.lock:
+            self.version += 1
+
+    def stats(self):
+        """Return cache counters"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "version": self.version
+        }
+
+_cache = LedgerCache()
+
 class BudgetDatabase:
     """Database operations for budget tracking"""
-    
+
+    @staticmethod
+    def configure(config):
+        """Select the storage backend and replay any pending journal"""
+        global _storage, _analytics, _rollup, _totals
+        for store in (_rollup, _totals):
+            if store is not None:
+                store.close()
+        _storage = create_storage(config)
+        _analytics = None
+        _rollup = None
+        _totals = None
+        _cache.listeners = []
+        data_file = config.get('DATA_FILE', DATA_FILE)
+        if config.get('ANALYTICS_STORE') and not _storage.native_queries:
+            from app.analytics import ColumnarStore
+            _analytics = ColumnarStore(config.get('ANALYTICS_DIR') or f"{data_file}.columns", _storage.lock)
+            _cache.listeners.append(_analytics)
+        if config.get('ROLLUP_STORE') and not _storage.native_queries:
+            from app.analytics import MonthlyRollup
+            _rollup = MonthlyRollup(
+                config.get('ROLLUP_FILE') or f"{data_file}.rollup.json",
+                flush_every=config.get('ROLLUP_FLUSH_EVERY', 50),
+                lock=_storage.lock
+            )
+            _cache.listeners.append(_rollup)
+        if config.get('RUNNING_TOTALS') and not _storage.native_queries:
+            from app.analytics import RunningTotals
+            _totals = RunningTotals(
+                config.get('RUNNING_TOTALS_FILE') or f"{data_file}.totals.json",
+                flush_every=config.get('ROLLUP_FLUSH_EVERY', 50),
+                lock=_storage.lock
+            )
+            _cache.listeners.append(_totals)
+        _cache.invalidate()
+        _cache.data = None
+        if not _storage.native_queries:
+            _cache.get(_storage)
+
+    @staticmethod
+    def _columns():
+        """Return the columnar store, brought in sync with the cached ledger"""
+        with _cache.lock:
+            ledger = _cache.get(_storage)
+            _analytics.sync(ledger, _cache.signature)
+            return _analytics
+
     @staticmethod
     def load_data():
-        """Load all transactions from file"""
-        if os.path.exists(DATA_FILE):
-            with open(DATA_FILE, 'r') as f:
-                return json.load(f)
-        return {"transactions": []}
+        """Load all transactions, served from the in-memory cache"""
+        return {"transactions": _cache.get(_storage).transactions()}
 
     @staticmethod
     def save_data(data):
-        """Save transactions to file"""
-        with open(DATA_FILE, 'w') as f:
-            json.dump(data, f, indent=2)
+        """Save transactions to storage"""
+        assign_missing_ids(data["transactions"])
+        _cache.write(
+            _storage,
+            lambda: _storage.save(data),
+            ("replace", data["transactions"])
+        )
+
+    @staticmethod
+    def cache_stats():
+        """Return ledger cache hit/miss counters"""
+        return _cache.stats()
+
+    @staticmethod
+    def ledger_version():
+        """Return a token that changes whenever the ledger changes
+
+        Combines the cache's write counter with the storage signature, so
+        writes made by other processes change it too.
+        """
+        return (_cache.version, _storage.signature())
+
+    @staticmethod
+    def ledger_etag():
+        """Return a short hash of the storage signature for use as an HTTP ETag
+
+        Unlike ledger_version() it leaves out this process's write counter,
+        so every worker serving the same ledger sends the same tag.
+        """
+        return hashlib.blake2b(repr(_storage.signature()).encode(), digest_size=8).hexdigest()
 
     @staticmethod
     def add_transaction(transaction_type, amount, category, description, date=None):
         """Add a new transaction"""
         transaction = Transaction(transaction_type, amount, category, description, date)
-        data = BudgetDatabase.load_data()
-        data["transactions"].append(transaction.to_dict())
-        BudgetDatabase.save_data(data)
-        return transaction.to_dict()
+        record = transaction.to_dict()
+        _cache.write(
+            _storage,
+            lambda: _storage.append(record),
+            ("add", transaction)
+        )
+        return record
+
+    @staticmethod
+    def add_transactions(transactions):
+        """Add already validated Transaction objects in a single storage write"""
+        records = [transaction.to_dict() for transaction in transactions]
+        if records:
+            _cache.write(
+                _storage,
+                lambda: _storage.append_many(records),
+                ("add_many", transactions)
+            )
+        return records
+
+    @staticmethod
+    def add_transaction_batch(items):
+        """Validate items independently and add the valid ones in one write
+
+        Returns one result per item, in order: ``{"index", "success", "data"}``
+        for added transactions and ``{"index", "success", "message"}`` for
+        rejected ones.
+        """
+        results = []
+        transactions = []
+        for index, item in enumerate(items):
+            try:
+                if not isinstance(item, dict):
+                    raise ValueError("Item must be an object")
+                missing = [field for field in ("type", "amount", "category", "description") if field not in item]
+                if missing:
+                    raise ValueError(f"Missing fields: {', '.join(missing)}")
+                transaction = Transaction(item['type'], item['amount'], item['category'],
+                                          item['description'], item.get('date'))
+            except Exception as e:
+                results.append({"index": index, "success": False, "message": str(e)})
+                continue
+            transactions.append(transaction)
+            results.append({"index": index, "success": True, "data": None})
+
+        records = iter(BudgetDatabase.add_transactions(transactions))
+        for result in results:
+            if result["success"]:
+                result["data"] = next(records)
+        return results
 
     @staticmethod
     def get_all_transactions():
@@ -58,28 +616,229 @@ class BudgetDatabase:
         data = BudgetDatabase.load_data()
         return data.get("transactions", [])
 
+    @staticmethod
+    def get_transaction(transaction_id):
+        """Get a transaction by id, or None"""
+        if _storage.native_queries:
+            return _storage.get(transaction_id)
+        transaction = _cache.get(_storage).get(transaction_id)
+        return transaction.to_dict() if transaction is not None else None
+
     @staticmethod
     def delete_transaction(index):
-        """Delete a transaction by index"""
-        data = BudgetDatabase.load_data()
-        if 0 <= index < len(data["transactions"]):
-            data["transactions"].pop(index)
-            BudgetDatabase.save_data(data)
-            return True
-        return False
+        """Delete a transaction by its position in the ledger"""
+        transaction_id = _cache.get(_storage).id_at(index)
+        if transaction_id is None:
+            return False
+        return BudgetDatabase.delete_transaction_by_id(transaction_id)
+
+    @staticmethod
+    def delete_transaction_by_id(transaction_id):
+        """Delete a transaction by id"""
+        def delete():
+            if not BudgetDatabase._known(transaction_id):
+                return False
+            return _storage.delete(transaction_id)
+
+        return _cache.write(_storage, delete, ("delete", transaction_id))
+
+    @staticmethod
+    def update_transaction(transaction_id, changes):
+        """Update fields of a transaction by id; return the updated transaction or None"""
+        changes = Transaction.validate_changes(changes)
+
+        def update():
+            if not BudgetDatabase._known(transaction_id):
+                return False
+            return _storage.update(transaction_id, changes)
+
+        if _cache.write(_storage, update, ("update", transaction_id, changes)) is False:
+            return None
+        return BudgetDatabase.get_transaction(transaction_id)
+
+    @staticmethod
+    def _known(transaction_id):
+        """Check, inside a cache write, that the cached ledger has an id
+
+        Backends that answer queries themselves report unknown ids from
+        their own delete and update.
+        """
+        return _storage.native_queries or transaction_id in _cache.get(_storage)
+
+    @staticmethod
+    def get_transactions_between(start, end):
+        """Get transactions dated on or after start and before end (YYYY-MM-DD),
+        ordered by date"""
+        if _storage.native_queries:
+            return _storage.transactions_between(normalize_date(start), normalize_date(end))
+        with _cache.lock:
+            return [t.to_dict() for t in _cache.get(_storage).between(start, end)]
+
+    @staticmethod
+    def query_transactions(limit=50, cursor=None, sort="date", descending=True, start=None, end=None,
+                           transaction_type=None, category=None, min_amount=None, max_amount=None):
+        """Get one page of transactions matching filters, ordered by date or amount
+
+        Dates are an inclusive start and exclusive end (YYYY-MM-DD), amounts
+        an inclusive range; ties are ordered by id.  Returns
+        {"transactions": [...], "next_cursor": ...} where next_cursor, passed
+        back with the same sort and filters, fetches the following page and
+        is None on the last one.
+        """
+        if sort not in SORT_ORDERS:
+            raise ValueError(f"Unknown sort order: {sort}")
+        if limit < 1:
+            raise ValueError("limit must be positive")
+        filters = {
+            "start": start,
+            "end": end,
+            "type": transaction_type,
+            "category": category,
+            "min_cents": None if min_amount is None else to_cents(min_amount),
+            "max_cents": None if max_amount is None else to_cents(max_amount),
+        }
+        filters = {name: value for name, value in filters.items() if value is not None}
+        for name in ("start", "end"):
+            if name in filters:
+                filters[name] = normalize_date(filters[name])
+        after = decode_cursor(cursor, sort, descending) if cursor else None
+
+        # Fetch one extra row to learn whether there is a next page
+        if _storage.native_queries:
+            rows = _storage.page(filters, sort, descending, after, limit + 1)
+        else:
+            if after is not None and sort == "date":
+                after = (date_to_ordinal(after[0]), after[1])
+            with _cache.lock:
+                rows = [t.to_dict() for t in _cache.get(_storage).page(filters, sort, descending, after, limit + 1)]
+
+        next_cursor = encode_cursor(sort, descending, rows[limit - 1]) if len(rows) > limit else None
+        return {"transactions": rows[:limit], "next_cursor": next_cursor}
+
+    @staticmethod
+    def get_recent_transactions(limit=10):
+        """Get the latest transactions by date, newest first"""
+        if _storage.native_queries:
+            return _storage.recent_transactions(limit)
+        with _cache.lock:
+            return [t.to_dict() for t in _cache.get(_storage).latest(limit)]
+
+    @staticmethod
+    def get_totals(start=None, end=None):
+        """Get transaction count, total income and total expenses"""
+        if _storage.native_queries:
+            return _storage.totals(start, end)
+        if _analytics is not None:
+            with _cache.lock:
+                return BudgetDatabase._columns().totals(start, end)
+
+        with _cache.lock:
+            ledger = _cache.get(_storage)
+            transactions = ledger if start is None or end is None else ledger.between(start, end)
+
+            income_code = TYPE_CODES.code("income")
+            income = 0
+            expenses = 0
+            for transaction in transactions:
+                if transaction.type_code == income_code:
+                    income += transaction.cents
+                else:
+                    expenses += transaction.cents
+            return {"count": len(transactions), "income": from_cents(income), "expenses": from_cents(expenses)}
+
+    @staticmethod
+    def get_period_totals(period='all', date=None):
+        """Get count, income and expenses for the period ('all', 'year',
+        'quarter' or 'month') containing date, which defaults to today"""
+        date = date or datetime.now().strftime("%Y-%m-%d")
+        if _totals is not None:
+            from app.analytics import period_key
+            with _cache.lock:
+                _totals.sync(_cache.get(_storage), _cache.signature)
+                return _totals.totals(period_key(period, date))
+        return BudgetDatabase.get_totals(*period_bounds(period, date))
+
+    @staticmethod
+    def get_category_totals(start=None, end=None, transaction_type='expense'):
+        """Get (category, amount) pairs, optionally within a date range, largest first"""
+        if _storage.native_queries:
+            return _storage.category_totals(start, end, transaction_type)
+        if _analytics is not None:
+            with _cache.lock:
+                return BudgetDatabase._columns().category_totals(start, end, transaction_type)
+
+        with _cache.lock:
+            type_code = TYPE_CODES.code(transaction_type)
+            totals = {}
+            ledger = _cache.get(_storage)
+            transactions = ledger if start is None or end is None else ledger.between(start, end)
+            for transaction in transactions:
+                if transaction.type_code == type_code:
+                    code = transaction.category_code
+                    totals[code] = totals.get(code, 0) + transaction.cents
+        return [
+            (CATEGORY_CODES.values[code], from_cents(cents))
+            for code, cents in sorted(totals.items(), key=lambda item: item[1], reverse=True)
+        ]
+
+    @staticmethod
+    def get_month_rollup(year, month):
+        """Get {type: {category: [amount, count]}} for one month"""
+        if _storage.native_queries:
+            return _storage.month_rollup(*month_bounds(year, month))
+        if _rollup is not None:
+            with _cache.lock:
+                _rollup.sync(_cache.get(_storage), _cache.signature)
+                return _rollup.month(year, month)
+
+        rollup = {}
+        with _cache.lock:
+            for transaction in _cache.get(_storage).between(*month_bounds(year, month)):
+                categories = rollup.setdefault(transaction.type, {})
+                entry = categories.setdefault(transaction.category, [0, 0])
+                entry[0] += transaction.cents
+                entry[1] += 1
+        for categories in rollup.values():
+            for entry in categories.values():
+                entry[0] = from_cents(entry[0])
+        return rollup
+
+    @staticmethod
+    def get_year_rollups(year):
+        """Get {month: {type: {category: [amount, count]}}} for every month of
+        a year with transactions, from a single range read"""
+        start, end = f"{year}-01-01", f"{year + 1}-01-01"
+        if _storage.native_queries:
+            rows = [
+                (t["date"], t["type"], t["category"], to_cents(t["amount"]))
+                for t in _storage.transactions_between(start, end)
+            ]
+        else:
+            with _cache.lock:
+                rows = [(t.date, t.type, t.category, t.cents) for t in _cache.get(_storage).between(start, end)]
+
+        rollups = {}
+        for date, transaction_type, category, cents in rows:
+            categories = rollups.setdefault(int(date[5:7]), {}).setdefault(transaction_type, {})
+            entry = categories.setdefault(category, [0, 0])
+            entry[0] += cents
+            entry[1] += 1
+        for rollup in rollups.values():
+            for categories in rollup.values():
+                for entry in categories.values():
+                    entry[0] = from_cents(entry[0])
+        return rollups
 
     @staticmethod
     def get_transactions_by_month(year, month):
         """Get transactions for a specific month"""
         import pandas as pd
-        data = BudgetDatabase.load_data()
-        df = pd.DataFrame(data["transactions"])
-        
-        if df.empty:
+        start, end = month_bounds(year, month)
+        transactions = BudgetDatabase.get_transactions_between(start, end)
+
+        if not transactions:
             return None
-        
+
+        df = pd.DataFrame(transactions)
         df['date'] = pd.to_datetime(df['date'])
-        df['year_month'] = df['date'].dt.to_period('M')
-        
-        target_month = pd.Period(f"{year}-{month:02d}", freq='M')
-        return df[df['year_month'] == target_month]
+        return df
@@ -0,0 +1,24 @@
+"""
+Currency amounts for Budget Tracker
+
+Amounts are decimal currency units at the edges (JSON, CSV, storage files)
+and integer minor units (cents) everywhere they are compared or summed.
+Every layer converts with these helpers so they all round the same way.
+"""
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+
+def to_cents(amount):
+    """Convert an amount in currency units to integer minor units (cents)"""
+    try:
+        value = Decimal(str(amount))
+    except InvalidOperation:
+        value = None
+    if value is None or not value.is_finite():
+        raise ValueError(f"Invalid amount: {amount}")
+    return int((value * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def from_cents(cents):
+    """Convert integer minor units back to a currency amount"""
+    return cents / 100
@@ -1,25 +1,62 @@
 """
 API routes for Budget Tracker
 """
-from flask import Blueprint, render_template, request, jsonify, send_file
-from app.models import BudgetDatabase
+from functools import wraps
+from flask import Blueprint, current_app, make_response, render_template, request, jsonify, send_file
+from app.models import BudgetDatabase, normalize_date
+from app.importer import detect_format, import_transactions
 from app.utils import (
     get_monthly_summary,
     get_category_analysis,
+    get_range_summary,
+    get_quarterly_summary,
+    get_trends,
+    chart_image,
+    get_chart_data,
+    export_year_charts,
+    CHART_FORMATS,
     generate_category_chart,
     generate_income_vs_expense_chart,
     check_budget_alert,
+    get_dashboard,
+    month_memo,
+    chart_cache,
     export_all_transactions_csv,
     export_monthly_report_csv,
-    export_category_analysis_csv
+    export_category_analysis_csv,
+    export_all_transactions_xlsx,
+    export_monthly_report_xlsx,
+    export_category_analysis_xlsx
 )
 from io import BytesIO
-from datetime import datetime
+from datetime import date, datetime
 
 # Create blueprint
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 main_bp = Blueprint('main', __name__)
 
+def conditional(view):
+    """Tag a read endpoint's response with an ETag of the ledger version
+
+    A request whose If-None-Match already holds the current tag gets an
+    empty 304 before the view runs, so unchanged polls cost one stat of
+    the storage files.  The date is part of the tag because some reports
+    default to the current month or year.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        etag = f"{BudgetDatabase.ledger_etag()}-{date.today():%Y%m%d}"
+        if request.if_none_match.contains_weak(etag):
+            response = current_app.response_class(status=304)
+        else:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+        response.set_etag(etag)
+        response.cache_control.no_cache = True
+        return response
+    return wrapper
+
 # Main Routes
 @main_bp.route('/')
 def index():
@@ -28,12 +65,43 @@ def index():
 
 # API Routes
 @api_bp.route('/transactions', methods=['GET'])
+@conditional
 def get_transactions():
-    """Get all transactions"""
-    transactions = BudgetDatabase.get_all_transactions()
-    # Sort by date descending
-    transactions.sort(key=lambda x: x['date'], reverse=True)
-    return jsonify({"transactions": transactions})
+    """Get a page of transactions
+
+    Query parameters: limit, cursor (next_cursor of the previous page),
+    sort=date|amount, order=desc|asc, start and end (YYYY-MM-DD, end
+    exclusive), type, category, min_amount and max_amount.
+    """
+    args = request.args
+    try:
+        limit = int(args.get('limit', current_app.config['TRANSACTIONS_PAGE_SIZE']))
+        if not 1 <= limit <= current_app.config['TRANSACTIONS_PAGE_MAX']:
+            raise ValueError(f"limit must be between 1 and {current_app.config['TRANSACTIONS_PAGE_MAX']}")
+        order = args.get('order', 'desc')
+        if order not in ('asc', 'desc'):
+            raise ValueError("order must be 'asc' or 'desc'")
+        for name in ('start', 'end'):
+            if args.get(name):
+                try:
+                    datetime.strptime(args[name], "%Y-%m-%d")
+                except ValueError:
+                    raise ValueError(f"{name} must be a date in YYYY-MM-DD format") from None
+        page = BudgetDatabase.query_transactions(
+            limit=limit,
+            cursor=args.get('cursor') or None,
+            sort=args.get('sort', 'date'),
+            descending=order == 'desc',
+            start=args.get('start') or None,
+            end=args.get('end') or None,
+            transaction_type=args.get('type') or None,
+            category=args.get('category') or None,
+            min_amount=args.get('min_amount') or None,
+            max_amount=args.get('max_amount') or None
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(page)
 
 @api_bp.route('/add-transaction', methods=['POST'])
 def add_transaction():
@@ -51,9 +119,77 @@ def add_transaction():
     except Exception as e:
         return jsonify({"success": False, "message": str(e)}), 400
 
+@api_bp.route('/transactions/batch', methods=['POST'])
+def add_transaction_batch():
+    """Add an array of transactions in a single write, with a result per item"""
+    try:
+        items = request.json
+        if not isinstance(items, list):
+            items = items.get('transactions') if isinstance(items, dict) else None
+        if not isinstance(items, list):
+            return jsonify({"success": False, "message": "Expected an array of transactions"}), 400
+        limit = current_app.config['BATCH_MAX_ITEMS']
+        if len(items) > limit:
+            return jsonify({"success": False, "message": f"At most {limit} transactions per batch"}), 400
+
+        results = BudgetDatabase.add_transaction_batch(items)
+        added = sum(result["success"] for result in results)
+        return jsonify({
+            "success": added == len(results),
+            "message": f"Added {added} of {len(results)} transactions",
+            "results": results
+        })
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+@api_bp.route('/import', methods=['POST'])
+def import_file():
+    """Import transactions from an uploaded CSV or JSON-lines file
+
+    Send the file as multipart field ``file`` or as the raw request body;
+    ``?format=csv|jsonl`` overrides detection from the file name or type.
+    """
+    try:
+        upload = request.files.get('file')
+        if upload is not None:
+            source = upload.stream
+            fmt = request.args.get('format') or detect_format(upload.filename, upload.mimetype)
+        else:
+            source = request.stream
+            fmt = request.args.get('format') or detect_format(mimetype=request.mimetype)
+        summary = import_transactions(source, fmt, current_app.config['IMPORT_CHUNK_SIZE'])
+        return jsonify({
+            "success": True,
+            "message": f"Imported {summary['imported']} transactions",
+            **summary
+        })
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+@api_bp.route('/transactions/<transaction_id>', methods=['DELETE'])
+def delete_transaction_by_id(transaction_id):
+    """Delete a transaction by id"""
+    try:
+        if BudgetDatabase.delete_transaction_by_id(transaction_id):
+            return jsonify({"success": True, "message": "Transaction deleted"})
+        return jsonify({"success": False, "message": "Transaction not found"}), 404
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+@api_bp.route('/transactions/<transaction_id>', methods=['PATCH'])
+def update_transaction(transaction_id):
+    """Update fields of a transaction by id"""
+    try:
+        transaction = BudgetDatabase.update_transaction(transaction_id, request.json or {})
+        if transaction is None:
+            return jsonify({"success": False, "message": "Transaction not found"}), 404
+        return jsonify({"success": True, "message": "Transaction updated", "data": transaction})
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
 @api_bp.route('/delete-transaction/<int:index>', methods=['DELETE'])
 def delete_transaction(index):
-    """Delete a transaction"""
+    """Delete a transaction by its position in the ledger (legacy)"""
     try:
         if BudgetDatabase.delete_transaction(index):
             return jsonify({"success": True, "message": "Transaction deleted"})
@@ -62,6 +198,7 @@ def delete_transaction(index):
         return jsonify({"success": False, "message": str(e)}), 400
 
 @api_bp.route('/monthly-report/<int:year>/<int:month>', methods=['GET'])
+@conditional
 def monthly_report(year, month):
     """Get monthly report"""
     summary = get_monthly_summary(year, month)
@@ -77,6 +214,7 @@ def monthly_report(year, month):
     })
 
 @api_bp.route('/category-analysis/<int:year>/<int:month>', methods=['GET'])
+@conditional
 def category_analysis(year, month):
     """Get category-wise spending analysis"""
     categories = get_category_analysis(year, month)
@@ -85,81 +223,267 @@ def category_analysis(year, month):
     
     return jsonify({"categories": categories})
 
+@api_bp.route('/quarterly-report/<int:year>/<int:quarter>', methods=['GET'])
+@conditional
+def quarterly_report(year, quarter):
+    """Get income, expenses and category spending for a quarter"""
+    if not 1 <= quarter <= 4:
+        return jsonify({"error": "Quarter must be between 1 and 4"}), 400
+    
+    summary = get_quarterly_summary(year, quarter)
+    if summary is None:
+        return jsonify({"error": f"No transactions found for {year}-Q{quarter}"}), 404
+    
+    return jsonify({"year": year, "quarter": quarter, **summary})
+
+@api_bp.route('/report', methods=['GET'])
+@conditional
+def range_report():
+    """Get income, expenses and category spending for ?start=YYYY-MM-DD&end=YYYY-MM-DD (end exclusive)"""
+    start = request.args.get('start')
+    end = request.args.get('end')
+    try:
+        datetime.strptime(start or '', "%Y-%m-%d")
+        datetime.strptime(end or '', "%Y-%m-%d")
+    except ValueError:
+        return jsonify({"error": "start and end must be dates in YYYY-MM-DD format"}), 400
+    start, end = normalize_date(start), normalize_date(end)
+    
+    summary = get_range_summary(start, end)
+    if summary is None:
+        return jsonify({"error": f"No transactions found between {start} and {end}"}), 404
+    
+    return jsonify(summary)
+
+@api_bp.route('/trends', methods=['GET'])
+@conditional
+def trends():
+    """Get income, expense, balance and category series for
+    ?from=YYYY-MM&to=YYYY-MM&group=month|quarter|year, with year-over-year changes
+
+    Defaults to the twelve months ending with the current one.
+    """
+    today = datetime.now()
+    end_month = request.args.get('to') or today.strftime("%Y-%m")
+    start_month = request.args.get('from')
+    if not start_month:
+        try:
+            to_date = datetime.strptime(end_month, "%Y-%m")
+        except ValueError:
+            return jsonify({"error": "to must be a month in YYYY-MM format"}), 400
+        months = to_date.year * 12 + to_date.month - 12
+        start_month = f"{months // 12}-{months % 12 + 1:02d}"
+    try:
+        return jsonify(get_trends(start_month, end_month, request.args.get('group', 'month')))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
 @api_bp.route('/chart/category/<int:year>/<int:month>', methods=['GET'])
+@conditional
 def chart_category(year, month):
     """Generate category pie chart"""
-    image = generate_category_chart(year, month)
+    try:
+        image = generate_category_chart(year, month)
+    except TimeoutError as e:
+        return jsonify({"error": str(e)}), 503
     if image is None:
         return jsonify({"error": "No expenses found"}), 404
     
     return jsonify({"image": image})
 
 @api_bp.route('/chart/income-vs-expense/<int:year>/<int:month>', methods=['GET'])
+@conditional
 def chart_income_vs_expense(year, month):
     """Generate income vs expense bar chart"""
-    image = generate_income_vs_expense_chart(year, month)
+    try:
+        image = generate_income_vs_expense_chart(year, month)
+    except TimeoutError as e:
+        return jsonify({"error": str(e)}), 503
     if image is None:
         return jsonify({"error": "No transactions found"}), 404
     
     return jsonify({"image": image})
 
+@api_bp.route('/chart-data/<any(category, "income-vs-expense"):chart>/<int:year>/<int:month>', methods=['GET'])
+@conditional
+def chart_data(chart, year, month):
+    """Get a chart's labels, values and percentages for drawing it in the browser"""
+    data = get_chart_data(chart, year, month)
+    if data is None:
+        return jsonify({"error": "No expenses found" if chart == 'category' else "No transactions found"}), 404
+    return jsonify(data)
+
+@api_bp.route('/chart/<any(category, "income-vs-expense"):chart>/<int:year>/<int:month>.<any(png, svg):fmt>',
+              methods=['GET'])
+def chart_file(chart, year, month, fmt):
+    """Get a chart as PNG or SVG bytes (?width=&height= in pixels, ?dpi=)
+
+    The ETag covers the plotted numbers and rendering options, so browsers
+    revalidate with If-None-Match and only download a chart again when it
+    changes.
+    """
+    try:
+        width, height, dpi = (
+            int(request.args[name]) if request.args.get(name) else default
+            for name, default in (('width', None), ('height', None), ('dpi', 100))
+        )
+    except ValueError:
+        return jsonify({"error": "width, height and dpi must be whole numbers"}), 400
+    max_pixels = current_app.config['CHART_MAX_PIXELS']
+    max_dpi = current_app.config['CHART_MAX_DPI']
+    if not 20 <= dpi <= max_dpi:
+        return jsonify({"error": f"dpi must be between 20 and {max_dpi}"}), 400
+    if any(size is not None and not 50 <= size <= max_pixels for size in (width, height)):
+        return jsonify({"error": f"width and height must be between 50 and {max_pixels} pixels"}), 400
+
+    found = chart_image(chart, year, month, fmt, width, height, dpi)
+    if found is None:
+        return jsonify({"error": "No expenses found" if chart == 'category' else "No transactions found"}), 404
+
+    etag, image = found
+    if request.if_none_match.contains_weak(etag):
+        response = current_app.response_class(status=304)
+    else:
+        try:
+            response = current_app.response_class(image(), mimetype=CHART_FORMATS[fmt])
+        except TimeoutError as e:
+            return jsonify({"error": str(e)}), 503
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.no_cache = True
+    return response
+
+@api_bp.route('/charts/year/<int:year>', methods=['GET'])
+@conditional
+def year_charts(year):
+    """Download every monthly chart of a year as a zip (?layout=zip) or a
+    single PNG sprite sheet (?layout=sprite)"""
+    layout = request.args.get('layout', 'zip')
+    try:
+        content = export_year_charts(year, layout)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except TimeoutError as e:
+        return jsonify({"error": str(e)}), 503
+    if content is None:
+        return jsonify({"error": f"No transactions found for {year}"}), 404
+
+    if layout == 'sprite':
+        mimetype, filename = 'image/png', f"charts_{year}.png"
+    else:
+        mimetype, filename = 'application/zip', f"charts_{year}.zip"
+    return send_file(BytesIO(content), mimetype=mimetype, as_attachment=True, download_name=filename)
+
 @api_bp.route('/budget-alert', methods=['GET'])
+@conditional
 def budget_alert():
     """Check budget status and return alert if expenses exceed income"""
-    alert_data = check_budget_alert()
+    period = request.args.get('period', current_app.config.get('BUDGET_ALERT_PERIOD', 'all'))
+    try:
+        alert_data = check_budget_alert(period)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     return jsonify(alert_data)
 
+@api_bp.route('/dashboard', methods=['GET'])
+@conditional
+def dashboard():
+    """Get totals, top categories, the budget alert and recent transactions
+    (?top=10&recent=10&period=all)"""
+    try:
+        top = int(request.args.get('top', 10))
+        recent = int(request.args.get('recent', 10))
+        period = request.args.get('period', current_app.config.get('BUDGET_ALERT_PERIOD', 'all'))
+        if top < 0 or recent < 0:
+            raise ValueError("top and recent must not be negative")
+        return jsonify(get_dashboard(top, recent, period))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+@api_bp.route('/cache-stats', methods=['GET'])
+def cache_stats():
+    """Get ledger cache, month memo and chart cache hit/miss counters"""
+    return jsonify({
+        **BudgetDatabase.cache_stats(),
+        "month_memo": month_memo.stats(),
+        "chart_cache": chart_cache.stats()
+    })
+
 @api_bp.route('/export/all-transactions', methods=['GET'])
+@conditional
 def export_all_transactions():
-    """Export all transactions as CSV"""
-    csv_content = export_all_transactions_csv()
-    if csv_content is None:
+    """Export all transactions as CSV, streamed in chunks"""
+    chunks = export_all_transactions_csv(current_app.config['EXPORT_CHUNK_SIZE'])
+    if chunks is None:
         return jsonify({"error": "No transactions to export"}), 404
     
-    # Create file-like object
-    csv_file = BytesIO(csv_content.encode('utf-8'))
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"budget_transactions_{timestamp}.csv"
-    
-    return send_file(
-        csv_file,
-        mimetype='text/csv',
-        as_attachment=True,
-        download_name=filename
-    )
+    return _csv_download(chunks, f"budget_transactions_{timestamp}.csv")
 
 @api_bp.route('/export/monthly-report/<int:year>/<int:month>', methods=['GET'])
+@conditional
 def export_monthly_report(year, month):
-    """Export monthly report as CSV"""
-    csv_content = export_monthly_report_csv(year, month)
-    if csv_content is None:
+    """Export monthly report as CSV, streamed in chunks"""
+    chunks = export_monthly_report_csv(year, month, current_app.config['EXPORT_CHUNK_SIZE'])
+    if chunks is None:
         return jsonify({"error": f"No data for {year}-{month:02d}"}), 404
     
-    # Create file-like object
-    csv_file = BytesIO(csv_content.encode('utf-8'))
-    filename = f"budget_report_{year}_{month:02d}.csv"
-    
-    return send_file(
-        csv_file,
-        mimetype='text/csv',
-        as_attachment=True,
-        download_name=filename
-    )
+    return _csv_download(chunks, f"budget_report_{year}_{month:02d}.csv")
 
 @api_bp.route('/export/category-analysis/<int:year>/<int:month>', methods=['GET'])
+@conditional
 def export_category_analysis(year, month):
     """Export category analysis as CSV"""
     csv_content = export_category_analysis_csv(year, month)
     if csv_content is None:
         return jsonify({"error": f"No data for {year}-{month:02d}"}), 404
     
-    # Create file-like object
-    csv_file = BytesIO(csv_content.encode('utf-8'))
-    filename = f"budget_category_analysis_{year}_{month:02d}.csv"
+    return _csv_download([csv_content], f"budget_category_analysis_{year}_{month:02d}.csv")
+
+@api_bp.route('/export/all-transactions/xlsx', methods=['GET'])
+@conditional
+def export_all_transactions_excel():
+    """Export all transactions as an XLSX workbook"""
+    workbook = export_all_transactions_xlsx(current_app.config['EXPORT_CHUNK_SIZE'])
+    if workbook is None:
+        return jsonify({"error": "No transactions to export"}), 404
     
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return _xlsx_download(workbook, f"budget_transactions_{timestamp}.xlsx")
+
+@api_bp.route('/export/monthly-report/<int:year>/<int:month>/xlsx', methods=['GET'])
+@conditional
+def export_monthly_report_excel(year, month):
+    """Export monthly report as an XLSX workbook"""
+    workbook = export_monthly_report_xlsx(year, month, current_app.config['EXPORT_CHUNK_SIZE'])
+    if workbook is None:
+        return jsonify({"error": f"No data for {year}-{month:02d}"}), 404
+    
+    return _xlsx_download(workbook, f"budget_report_{year}_{month:02d}.xlsx")
+
+@api_bp.route('/export/category-analysis/<int:year>/<int:month>/xlsx', methods=['GET'])
+@conditional
+def export_category_analysis_excel(year, month):
+    """Export category analysis as an XLSX workbook"""
+    workbook = export_category_analysis_xlsx(year, month)
+    if workbook is None:
+        return jsonify({"error": f"No data for {year}-{month:02d}"}), 404
+    
+    return _xlsx_download(workbook, f"budget_category_analysis_{year}_{month:02d}.xlsx")
+
+def _xlsx_download(workbook, filename):
+    """Send a saved workbook file as a download"""
     return send_file(
-        csv_file,
-        mimetype='text/csv',
+        workbook,
+        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
         as_attachment=True,
         download_name=filename
     )
+
+def _csv_download(chunks, filename):
+    """Stream CSV text chunks as a file download without buffering the file"""
+    response = current_app.response_class(
+        (chunk.encode('utf-8') for chunk in chunks), mimetype='text/csv'
+    )
+    response.headers.set('Content-Disposition', 'attachment', filename=filename)
+    return response
@@ -13,9 +13,8 @@ document.addEventListener('DOMContentLoaded', function() {
     document.getElementById('chartYear').value = now.getFullYear();
     document.getElementById('chartMonth').value = now.getMonth() + 1;
 
-    // Load dashboard and budget alert on page load
+    // Load dashboard (including the budget alert) on page load
     loadDashboard();
-    checkBudgetAlert();
 });
 
 function showMessage(message, type) {
@@ -27,31 +26,35 @@ function showMessage(message, type) {
     }, 3000);
 }
 
-function checkBudgetAlert() {
-    fetch('/api/budget-alert')
-    .then(res => res.json())
-    .then(data => {
-        const alertContainer = document.getElementById('budgetAlertContainer');
-        if (!alertContainer) return;
-
-        if (data.alert) {
-            // Expenses exceed income - show warning
-            alertContainer.innerHTML = `
-                <div class="alert-box danger">
-                    <strong>⚠️ BUDGET ALERT!</strong><br>
-                    ${data.message}
-                </div>
-            `;
-        } else if (data.message) {
-            // Good financial status
-            alertContainer.innerHTML = `
-                <div class="alert-box success">
-                    ${data.message}
-                </div>
-            `;
-        }
-    })
-    .catch(err => console.error('Error checking budget alert:', err));
+function renderBudgetAlert(data) {
+    const alertContainer = document.getElementById('budgetAlertContainer');
+    if (!alertContainer) return;
+
+    if (data.alert) {
+        // Expenses exceed income - show warning
+        alertContainer.innerHTML = `
+            <div class="alert-box danger">
+                <strong>⚠️ BUDGET ALERT!</strong><br>
+                ${data.message}
+            </div>
+        `;
+    } else if (data.message) {
+        // Good financial status
+        alertContainer.innerHTML = `
+            <div class="alert-box success">
+                ${data.message}
+            </div>
+        `;
+    } else {
+        alertContainer.innerHTML = '';
+    }
+}
+
+function refreshAfterChange() {
+    loadDashboard();
+    if (document.getElementById('transactions').classList.contains('active')) {
+        loadTransactions();
+    }
 }
 
 function addTransaction() {
@@ -79,9 +82,7 @@ function addTransaction() {
             document.getElementById('category').value = '';
             document.getElementById('description').value = '';
             document.getElementById('date').valueAsDate = new Date();
-            loadTransactions();
-            loadDashboard();
-            checkBudgetAlert();
+            refreshAfterChange();
         } else {
             showMessage(data.message, 'error');
         }
@@ -89,44 +90,88 @@ function addTransaction() {
     .catch(err => showMessage('Error: ' + err, 'error'));
 }
 
+// Cursor of the next page of the transactions table, or null on the last page
+let transactionsCursor = null;
+
+function transactionQuery() {
+    const [sort, order] = document.getElementById('filterSort').value.split(':');
+    const params = new URLSearchParams({ sort: sort, order: order });
+    const filters = {
+        start: 'filterStart',
+        end: 'filterEnd',
+        type: 'filterType',
+        category: 'filterCategory',
+        min_amount: 'filterMinAmount',
+        max_amount: 'filterMaxAmount'
+    };
+    Object.entries(filters).forEach(([name, id]) => {
+        const value = document.getElementById(id).value.trim();
+        if (value) params.set(name, value);
+    });
+    return params;
+}
+
 function loadTransactions() {
-    fetch('/api/transactions')
+    transactionsCursor = null;
+    fetchTransactionPage(false);
+}
+
+function loadMoreTransactions() {
+    if (transactionsCursor) fetchTransactionPage(true);
+}
+
+function fetchTransactionPage(append) {
+    const params = transactionQuery();
+    if (append) params.set('cursor', transactionsCursor);
+
+    fetch(`/api/transactions?${params}`)
     .then(res => res.json())
     .then(data => {
         const container = document.getElementById('transactionsContainer');
-        if (data.transactions.length === 0) {
-            container.innerHTML = '<div class="empty-state"><p>No transactions yet. Add one to get started!</p></div>';
+        const loadMore = document.getElementById('loadMoreTransactions');
+        if (data.error) {
+            showMessage(data.error, 'error');
+            return;
+        }
+
+        transactionsCursor = data.next_cursor;
+        loadMore.style.display = transactionsCursor ? 'block' : 'none';
+        if (!append && data.transactions.length === 0) {
+            container.innerHTML = '<div class="empty-state"><p>No transactions found.</p></div>';
             return;
         }
 
-        let html = '<table class="transactions-table"><thead><tr><th>Date</th><th>Type</th><th>Category</th><th>Description</th><th>Amount</th><th>Action</th></tr></thead><tbody>';
-        data.transactions.forEach((t, idx) => {
+        let rows = '';
+        data.transactions.forEach(t => {
             const badge = `<span class="badge ${t.type}">${t.type.toUpperCase()}</span>`;
-            html += `<tr>
+            rows += `<tr>
                 <td>${t.date}</td>
                 <td>${badge}</td>
                 <td>${t.category}</td>
                 <td>${t.description}</td>
                 <td>$${parseFloat(t.amount).toFixed(2)}</td>
-                <td><button class="delete-btn" onclick="deleteTransaction(${idx})">Delete</button></td>
+                <td><button class="delete-btn" onclick="deleteTransaction('${t.id}')">Delete</button></td>
             </tr>`;
         });
-        html += '</tbody></table>';
-        container.innerHTML = html;
+
+        if (append) {
+            container.querySelector('tbody').insertAdjacentHTML('beforeend', rows);
+        } else {
+            container.innerHTML = '<table class="transactions-table"><thead><tr><th>Date</th><th>Type</th><th>Category</th><th>Description</th><th>Amount</th><th>Action</th></tr></thead><tbody>'
+                + rows + '</tbody></table>';
+        }
     })
     .catch(err => console.error('Error:', err));
 }
 
-function deleteTransaction(index) {
+function deleteTransaction(id) {
     if (confirm('Are you sure you want to delete this transaction?')) {
-        fetch(`/api/delete-transaction/${index}`, { method: 'DELETE' })
+        fetch(`/api/transactions/${id}`, { method: 'DELETE' })
         .then(res => res.json())
         .then(data => {
             if (data.success) {
                 showMessage('Transaction deleted', 'success');
-                loadTransactions();
-                loadDashboard();
-                checkBudgetAlert();
+                refreshAfterChange();
             }
         })
         .catch(err => console.error('Error:', err));
@@ -200,58 +245,99 @@ function getChart(type) {
         return;
     }
 
-    const endpoint = type === 'category' ? 
-        `/api/chart/category/${year}/${month}` : 
-        `/api/chart/income-vs-expense/${year}/${month}`;
-
-    fetch(endpoint)
+    // Charts are drawn in the browser from the series; the server-rendered
+    // image stays available as a download
+    fetch(`/api/chart-data/${type}/${year}/${month}`)
     .then(res => res.json())
     .then(data => {
         const container = document.getElementById('chartsContainer');
         if (data.error) {
             container.innerHTML = `<div class="empty-state"><p>${data.error}</p></div>`;
         } else {
-            container.innerHTML = `<div class="chart-container"><img src="${data.image}" alt="Chart"></div>`;
+            const chart = type === 'category' ? drawPieChart(data) : drawBarChart(data);
+            container.innerHTML = `<div class="chart-container">${chart}
+                <p><a href="/api/chart/${type}/${year}/${month}.png" download>Download PNG</a></p></div>`;
         }
     })
     .catch(err => console.error('Error:', err));
 }
 
+// matplotlib's Set3 palette, matching the server-rendered pie chart
+const CHART_COLORS = ['#8dd3c7', '#ffffb3', '#bebada', '#fb8072', '#80b1d3', '#fdb462',
+                      '#b3de69', '#fccde5', '#d9d9d9', '#bc80bd', '#ccebc5', '#ffed6f'];
+
+function chartTitle(title, data) {
+    return `<text x="50%" y="24" text-anchor="middle" font-size="16" font-weight="bold">${title} - ${data.year}-${String(data.month).padStart(2, '0')}</text>`;
+}
+
+function drawPieChart(data) {
+    const cx = 190, cy = 200, radius = 150;
+    let angle = -Math.PI / 2;
+    let slices = '';
+    let legend = '';
+
+    data.values.forEach((value, i) => {
+        const color = CHART_COLORS[i % CHART_COLORS.length];
+        const sweep = value / data.total * 2 * Math.PI;
+        if (sweep >= 2 * Math.PI - 1e-9) {
+            slices += `<circle cx="${cx}" cy="${cy}" r="${radius}" fill="${color}"/>`;
+        } else if (sweep > 0) {
+            const x1 = cx + radius * Math.cos(angle), y1 = cy + radius * Math.sin(angle);
+            angle += sweep;
+            const x2 = cx + radius * Math.cos(angle), y2 = cy + radius * Math.sin(angle);
+            slices += `<path d="M${cx},${cy} L${x1},${y1} A${radius},${radius} 0 ${sweep > Math.PI ? 1 : 0} 1 ${x2},${y2} Z" fill="${color}" stroke="#fff"/>`;
+        }
+        legend += `<rect x="380" y="${50 + i * 24}" width="14" height="14" fill="${color}"/>
+            <text x="402" y="${62 + i * 24}" font-size="13">${data.labels[i]}: $${value.toFixed(2)} (${data.percentages[i].toFixed(1)}%)</text>`;
+    });
+
+    const height = Math.max(370, 70 + data.values.length * 24);
+    return `<svg viewBox="0 0 680 ${height}" width="100%" role="img">${chartTitle('Category-wise Spending', data)}${slices}${legend}</svg>`;
+}
+
+function drawBarChart(data) {
+    const colors = ['#2ecc71', '#e74c3c'];
+    const top = 60, base = 300;
+    const max = Math.max(...data.values) || 1;
+    let bars = '';
+
+    data.values.forEach((value, i) => {
+        const height = value / max * (base - top);
+        const x = 110 + i * 220;
+        bars += `<rect x="${x}" y="${base - height}" width="120" height="${height}" fill="${colors[i]}"/>
+            <text x="${x + 60}" y="${base - height - 6}" text-anchor="middle" font-weight="bold">$${value.toFixed(2)}</text>
+            <text x="${x + 60}" y="${base + 20}" text-anchor="middle">${data.labels[i]}</text>`;
+    });
+
+    return `<svg viewBox="0 0 560 330" width="100%" style="max-width: 560px;" role="img">${chartTitle('Income vs Expenses', data)}
+        <line x1="80" y1="${base}" x2="520" y2="${base}" stroke="#999"/>${bars}</svg>`;
+}
+
 function loadDashboard() {
-    fetch('/api/transactions')
+    fetch('/api/dashboard')
     .then(res => res.json())
     .then(data => {
+        renderBudgetAlert(data.alert);
+
         const container = document.getElementById('dashboardContainer');
-        if (data.transactions.length === 0) {
+        if (data.count === 0) {
             container.innerHTML = '<div class="empty-state"><p>No transactions yet. Start by adding your first transaction!</p></div>';
             return;
         }
 
-        let totalIncome = 0, totalExpense = 0;
-        const categorySpending = {};
-        
-        data.transactions.forEach(t => {
-            if (t.type === 'income') {
-                totalIncome += parseFloat(t.amount);
-            } else {
-                totalExpense += parseFloat(t.amount);
-                categorySpending[t.category] = (categorySpending[t.category] || 0) + parseFloat(t.amount);
-            }
-        });
-
         let html = `
             <div class="stats-grid">
                 <div class="stat-box">
                     <h3>Total Income</h3>
-                    <div class="amount">$${totalIncome.toFixed(2)}</div>
+                    <div class="amount">$${data.income.toFixed(2)}</div>
                 </div>
                 <div class="stat-box">
                     <h3>Total Expenses</h3>
-                    <div class="amount">$${totalExpense.toFixed(2)}</div>
+                    <div class="amount">$${data.expenses.toFixed(2)}</div>
                 </div>
                 <div class="stat-box">
                     <h3>Balance</h3>
-                    <div class="amount">$${(totalIncome - totalExpense).toFixed(2)}</div>
+                    <div class="amount">$${data.balance.toFixed(2)}</div>
                 </div>
             </div>
             <h3 style="margin-top: 30px; margin-bottom: 15px; color: #2c3e50;">Top Spending Categories</h3>
@@ -266,16 +352,36 @@ function loadDashboard() {
                 <tbody>
         `;
 
-        const sortedCategories = Object.entries(categorySpending)
-            .sort((a, b) => b[1] - a[1])
-            .slice(0, 10);
+        data.top_categories.forEach(cat => {
+            html += `<tr>
+                <td>${cat.category}</td>
+                <td>$${cat.amount.toFixed(2)}</td>
+                <td>${cat.percentage.toFixed(1)}%</td>
+            </tr>`;
+        });
+
+        html += `</tbody></table>
+            <h3 style="margin-top: 30px; margin-bottom: 15px; color: #2c3e50;">Recent Transactions</h3>
+            <table class="transactions-table">
+                <thead>
+                    <tr>
+                        <th>Date</th>
+                        <th>Type</th>
+                        <th>Category</th>
+                        <th>Description</th>
+                        <th>Amount</th>
+                    </tr>
+                </thead>
+                <tbody>
+        `;
 
-        sortedCategories.forEach(([cat, amount]) => {
-            const percentage = (amount / totalExpense) * 100;
+        data.recent_transactions.forEach(t => {
             html += `<tr>
-                <td>${cat}</td>
-                <td>$${amount.toFixed(2)}</td>
-                <td>${percentage.toFixed(1)}%</td>
+                <td>${t.date}</td>
+                <td><span class="badge ${t.type}">${t.type.toUpperCase()}</span></td>
+                <td>${t.category}</td>
+                <td>${t.description}</td>
+                <td>$${parseFloat(t.amount).toFixed(2)}</td>
             </tr>`;
         });
 
@@ -308,11 +414,16 @@ function switchTab(tabName) {
     }
 }
 
-function exportAllTransactionsCSV() {
-    window.location.href = '/api/export/all-transactions';
+// CSV exports live at the base URL, the XLSX variants under /xlsx
+function exportPath(path, format) {
+    return format === 'xlsx' ? `${path}/xlsx` : path;
+}
+
+function exportAllTransactions(format = 'csv') {
+    window.location.href = exportPath('/api/export/all-transactions', format);
 }
 
-function exportMonthlyReportCSV() {
+function exportMonthlyReport(format = 'csv') {
     const year = document.getElementById('reportYear').value;
     const month = document.getElementById('reportMonth').value;
 
@@ -321,10 +432,10 @@ function exportMonthlyReportCSV() {
         return;
     }
 
-    window.location.href = `/api/export/monthly-report/${year}/${month}`;
+    window.location.href = exportPath(`/api/export/monthly-report/${year}/${month}`, format);
 }
 
-function exportCategoryAnalysisCSV() {
+function exportCategoryAnalysis(format = 'csv') {
     const year = document.getElementById('analysisYear').value;
     const month = document.getElementById('analysisMonth').value;
 
@@ -333,5 +444,5 @@ function exportCategoryAnalysisCSV() {
         return;
     }
 
-    window.location.href = `/api/export/category-analysis/${year}/${month}`;
+    window.location.href = exportPath(`/api/export/category-analysis/${year}/${month}`, format);
 }
@@ -0,0 +1,1020 @@
+"""
+Storage backends for Budget Tracker
+"""
+import heapq
+import json
+import os
+import sqlite3
+try:
+    import fcntl
+except ImportError:  # Windows: locks only serialize threads of one process
+    fcntl = None
+import threading
+import time
+from collections import OrderedDict
+from app.ids import assign_missing_ids, new_transaction_id
+from app.money import to_cents
+
+
+def file_signature(path):
+    """Return (inode, mtime, size) for a file, or None if it does not exist
+
+    The inode changes when a file is atomically replaced, even by one of
+    the same size written within the same mtime tick.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+def fsync_path(path):
+    """Flush a file's written data to disk"""
+    fd = os.open(path, os.O_RDWR)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def write_atomic(path, write):
+    """Write a file through ``write(f)`` so readers never see it half written"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class FileLock:
+    """Reentrant lock shared by the threads of this process and, through
+    ``flock`` on a sidecar file, by every other process using the ledger"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._file = None
+
+    def __enter__(self):
+        self._lock.acquire()
+        if self._depth == 0 and fcntl is not None:
+            try:
+                # Opened per acquisition so forked workers never share it
+                self._file = open(self.path, 'a')
+                fcntl.flock(self._file, fcntl.LOCK_EX)
+            except BaseException:
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+                self._lock.release()
+                raise
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        self._depth -= 1
+        if self._depth == 0 and self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+        self._lock.release()
+
+
+class GroupCommit:
+    """Makes appended writes durable with one fsync per batch of writers
+
+    Storage calls ``written()`` after each append and writers call
+    ``commit()`` once they have released their locks.  The first committer
+    syncs everything written so far while later ones wait for it, so
+    concurrent writes share an fsync instead of queueing for one each.
+    ``window`` optionally delays the sync to let more writes join the batch.
+    """
+
+    def __init__(self, sync, window=0.0):
+        self.sync = sync
+        self.window = window
+        self._condition = threading.Condition()
+        self._written = 0
+        self._synced = 0
+        self._syncing = False
+
+    def written(self):
+        """Record that a write has reached the file"""
+        with self._condition:
+            self._written += 1
+
+    def commit(self):
+        """Return once every write recorded so far is on disk"""
+        with self._condition:
+            target = self._written
+            while self._synced < target and self._syncing:
+                self._condition.wait()
+            if self._synced >= target:
+                return
+            self._syncing = True
+
+        synced = self._synced
+        try:
+            if self.window:
+                time.sleep(self.window)
+            with self._condition:
+                batch = self._written
+            self.sync()
+            synced = batch
+        finally:
+            # On failure the waiters wake up and one of them retries the sync
+            with self._condition:
+                self._syncing = False
+                self._synced = max(self._synced, synced)
+                self._condition.notify_all()
+
+
+def read_entries(path):
+    """Yield the entries of a JSON-lines journal file
+
+    A line that does not parse, such as a torn line left by a process that
+    died mid-append, is skipped rather than ending the read, so entries
+    committed after it are kept.  When the torn bytes were followed on the
+    same line by a later entry, that entry is recovered.
+    """
+    if not os.path.exists(path):
+        return
+    with open(path, 'rb') as f:
+        for line in f:
+            # An unterminated last line is an append that never completed;
+            # the next append_entries() cuts it off
+            if not line.strip() or not line.endswith(b"\n"):
+                continue
+            entry = _parse_entry(line)
+            if entry is not None:
+                yield entry
+
+
+def _parse_entry(line):
+    try:
+        return json.loads(line)
+    except ValueError:
+        pass
+    # Journals appended to without repair_tail() can hold a torn entry
+    # followed directly by a complete one
+    start = line.rfind(b'{"op":')
+    if start > 0:
+        try:
+            return json.loads(line[start:])
+        except ValueError:
+            pass
+    return None
+
+
+def append_entries(path, entries):
+    """Append entries to a JSON-lines journal as one write
+
+    Callers hold the storage lock.  A torn last line left by an interrupted
+    append is cut off first, so the new entries start on a line of their own.
+    """
+    with open(path, 'a+b') as f:
+        end = f.seek(0, os.SEEK_END)
+        if end:
+            f.seek(end - 1)
+            if f.read(1) != b"\n":
+                f.truncate(_last_line_end(f, end))
+        f.write("".join(json.dumps(entry, separators=(',', ':')) + "\n" for entry in entries).encode())
+
+
+def _last_line_end(f, end, block=65536):
+    """Return the offset just past the last newline before end, or 0"""
+    while end > 0:
+        start = max(end - block, 0)
+        f.seek(start)
+        position = f.read(end - start).rfind(b"\n")
+        if position >= 0:
+            return start + position + 1
+        end = start
+    return 0
+
+
+class JSONStorage:
+    """Stores the whole ledger as a single JSON document"""
+
+    native_queries = False
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = FileLock(f"{path}.lock")
+
+    def load(self):
+        """Load all transactions from file"""
+        with self.lock:
+            data = {"transactions": []}
+            if os.path.exists(self.path):
+                with open(self.path, 'r') as f:
+                    data = json.load(f)
+            if assign_missing_ids(data.setdefault("transactions", [])):
+                self.save(data)
+            return data
+
+    def signature(self):
+        """Identify the current on-disk state of the ledger"""
+        return file_signature(self.path)
+
+    def save(self, data):
+        """Save transactions to a temporary file and rename it into place"""
+        with self.lock:
+            write_atomic(self.path, lambda f: json.dump(data, f, indent=2))
+
+    def commit(self):
+        """Saves are already durable"""
+
+    def append(self, transaction):
+        """Append a transaction by rewriting the whole document"""
+        with self.lock:
+            data = self.load()
+            data["transactions"].append(transaction)
+            self.save(data)
+
+    def append_many(self, transactions):
+        """Append transactions with a single rewrite of the document"""
+        with self.lock:
+            data = self.load()
+            data["transactions"].extend(transactions)
+            self.save(data)
+
+    def delete(self, transaction_id):
+        """Delete a transaction by id by rewriting the whole document"""
+        with self.lock:
+            data = self.load()
+            remaining = [t for t in data["transactions"] if t["id"] != transaction_id]
+            if len(remaining) == len(data["transactions"]):
+                return False
+            data["transactions"] = remaining
+            self.save(data)
+            return True
+
+    def update(self, transaction_id, changes):
+        """Update a transaction by id by rewriting the whole document"""
+        with self.lock:
+            data = self.load()
+            for transaction in data["transactions"]:
+                if transaction["id"] == transaction_id:
+                    transaction.update(changes)
+                    self.save(data)
+                    return True
+            return False
+
+
+class JournalStorage:
+    """Stores the ledger as a JSON snapshot plus an append-only journal
+
+    Adds, updates and deletes are written as single JSON lines to the
+    journal, so a write costs the same no matter how large the ledger is;
+    a delete is only a tombstone entry naming the transaction id.  The
+    journal is replayed over the snapshot on load and folded back into the
+    snapshot once it grows past ``compact_ratio`` times the snapshot size,
+    which keeps the amortized cost of a write constant.
+
+    Writes are serialized across processes with a ``FileLock`` and made
+    durable by ``commit()``, which group-commits journal appends.
+    """
+
+    native_queries = False
+
+    def __init__(self, path, journal_path=None, compact_min_entries=1000, compact_ratio=1.0,
+                 commit_window=0.0):
+        self.path = path
+        self.journal_path = journal_path or f"{path}.journal"
+        self.compact_min_entries = compact_min_entries
+        self.compact_ratio = compact_ratio
+        self.lock = FileLock(f"{path}.lock")
+        self._group = GroupCommit(lambda: fsync_path(self.journal_path), commit_window)
+        self._snapshot_count = None
+        self._journal_entries = 0
+
+    def load(self):
+        """Load the snapshot and replay the journal on top of it"""
+        with self.lock:
+            data = {"transactions": []}
+            if os.path.exists(self.path):
+                with open(self.path, 'r') as f:
+                    data = json.load(f)
+            transactions = data.setdefault("transactions", [])
+            needs_ids = assign_missing_ids(transactions)
+            self._snapshot_count = len(transactions)
+            self._journal_entries = 0
+
+            records = {t["id"]: t for t in transactions}
+            for entry in self._read_journal():
+                needs_ids |= self._apply(records, entry)
+                self._journal_entries += 1
+            data["transactions"] = list(records.values())
+
+            if needs_ids:
+                # Ledgers written before transactions had ids get them once,
+                # here, so they stay stable across reloads.
+                self.save(data)
+            return data
+
+    def signature(self):
+        """Identify the current on-disk state of the ledger"""
+        return (file_signature(self.path), file_signature(self.journal_path))
+
+    def save(self, data):
+        """Write a new snapshot and start an empty journal"""
+        with self.lock:
+            # json.dumps without indent runs on the C encoder; json.dump
+            # with a file or indent falls back to the pure Python one
+            write_atomic(self.path, lambda f: f.write(json.dumps(data, separators=(',', ':'))))
+            open(self.journal_path, 'w').close()
+
+            self._snapshot_count = len(data["transactions"])
+            self._journal_entries = 0
+
+    def commit(self):
+        """Wait until journal entries written so far are on disk"""
+        self._group.commit()
+
+    def append(self, transaction):
+        """Append an add entry to the journal"""
+        self._write_entry({"op": "add", "transaction": transaction})
+
+    def append_many(self, transactions):
+        """Append add entries for several transactions in one write"""
+        self._write_entries([{"op": "add", "transaction": t} for t in transactions])
+
+    def delete(self, transaction_id):
+        """Append a tombstone for a transaction to the journal"""
+        self._write_entry({"op": "delete", "id": transaction_id})
+        return True
+
+    def update(self, transaction_id, changes):
+        """Append an update entry to the journal"""
+        self._write_entry({"op": "update", "id": transaction_id, "changes": changes})
+        return True
+
+    def compact(self):
+        """Fold the journal into a fresh snapshot"""
+        with self.lock:
+            self.save(self.load())
+
+    def _read_journal(self):
+        return read_entries(self.journal_path)
+
+    @staticmethod
+    def _apply(records, entry):
+        """Apply one journal entry; return True if it needed an id assigned"""
+        op = entry["op"]
+        if op == "add":
+            transaction = entry["transaction"]
+            assigned = assign_missing_ids([transaction])
+            records[transaction["id"]] = transaction
+            return assigned
+        if op == "update":
+            if entry["id"] in records:
+                records[entry["id"]].update(entry["changes"])
+        elif op == "delete":
+            if "id" in entry:
+                records.pop(entry["id"], None)
+            elif 0 <= entry["index"] < len(records):
+                # Journals written before ids existed delete by position
+                del records[list(records)[entry["index"]]]
+        return False
+
+    def _write_entry(self, entry):
+        self._write_entries([entry])
+
+    def _write_entries(self, entries):
+        with self.lock:
+            if self._snapshot_count is None:
+                self.load()
+            append_entries(self.journal_path, entries)
+            self._group.written()
+            self._journal_entries += len(entries)
+            self._maybe_compact()
+
+    def _maybe_compact(self):
+        threshold = max(self.compact_min_entries, self.compact_ratio * self._snapshot_count)
+        if self._journal_entries >= threshold:
+            self.compact()
+
+
+class SQLiteStorage:
+    """Stores transactions in an indexed SQLite database
+
+    Besides the common storage interface this backend answers date range,
+    total and per-category queries directly in SQL, so reports do not need
+    to load the whole ledger.
+    """
+
+    native_queries = True
+
+    TABLE = """
+        CREATE TABLE IF NOT EXISTS transactions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            uid TEXT,
+            type TEXT NOT NULL,
+            amount REAL NOT NULL,
+            category TEXT NOT NULL,
+            description TEXT NOT NULL DEFAULT '',
+            date TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS ledger_version (
+            id INTEGER PRIMARY KEY CHECK (id = 0),
+            version INTEGER NOT NULL
+        );
+        INSERT OR IGNORE INTO ledger_version (id, version) VALUES (0, 0);
+    """
+
+    INDEXES = """
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_transactions_uid ON transactions (uid);
+        CREATE INDEX IF NOT EXISTS idx_transactions_date ON transactions (date);
+        CREATE INDEX IF NOT EXISTS idx_transactions_type_date ON transactions (type, date);
+        CREATE INDEX IF NOT EXISTS idx_transactions_category ON transactions (category);
+        CREATE INDEX IF NOT EXISTS idx_transactions_date_uid ON transactions (date, uid);
+        CREATE INDEX IF NOT EXISTS idx_transactions_amount_uid ON transactions (amount, uid);
+    """
+
+    # The integer primary key keeps insertion order; ``uid`` is the stable
+    # transaction id exposed through the API.
+    COLUMNS = "uid AS id, type, amount, category, description, date"
+    INSERT_COLUMNS = "uid, type, amount, category, description, date"
+
+    # Aggregates sum whole cents so totals do not drift with float rounding
+    CENTS = "CAST(ROUND(amount * 100) AS INTEGER)"
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = FileLock(f"{path}.lock")
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(self.TABLE)
+            self._migrate(conn)
+            conn.executescript(self.INDEXES)
+
+    @staticmethod
+    def _migrate(conn):
+        """Add and backfill the uid column on databases created without it"""
+        columns = [row["name"] for row in conn.execute("PRAGMA table_info(transactions)")]
+        if "uid" not in columns:
+            conn.execute("ALTER TABLE transactions ADD COLUMN uid TEXT")
+        missing = conn.execute("SELECT id FROM transactions WHERE uid IS NULL").fetchall()
+        conn.executemany(
+            "UPDATE transactions SET uid = ? WHERE id = ?",
+            ((new_transaction_id(), row["id"]) for row in missing)
+        )
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _rows(self, sql, params=()):
+        return [dict(row) for row in self._connect().execute(sql, params)]
+
+    def load(self):
+        """Load all transactions in insertion order"""
+        return {"transactions": self._rows(f"SELECT {self.COLUMNS} FROM transactions ORDER BY id")}
+
+    def signature(self):
+        """Identify the current state of the ledger
+
+        Every write bumps a version row in the same SQL transaction.  The
+        database and WAL files' mtimes also move on checkpoints and when a
+        process closes its connection, which would give each worker a
+        different signature for the same data.
+        """
+        stat = os.stat(self.path)
+        row = self._connect().execute("SELECT version FROM ledger_version").fetchone()
+        return (stat.st_ino, row["version"])
+
+    def commit(self):
+        """SQLite commits each write itself"""
+
+    def save(self, data):
+        """Replace every stored transaction"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM transactions")
+            self._insert(conn, data["transactions"])
+            self._bump(conn)
+
+    def append(self, transaction):
+        """Insert a single transaction"""
+        with self._connect() as conn:
+            self._insert(conn, [transaction])
+            self._bump(conn)
+
+    def append_many(self, transactions):
+        """Insert transactions in one SQL transaction"""
+        with self._connect() as conn:
+            self._insert(conn, transactions)
+            self._bump(conn)
+
+    def delete(self, transaction_id):
+        """Delete a transaction by id"""
+        with self._connect() as conn:
+            cursor = conn.execute("DELETE FROM transactions WHERE uid = ?", (transaction_id,))
+            self._bump(conn)
+        return cursor.rowcount > 0
+
+    def update(self, transaction_id, changes):
+        """Update fields of a transaction by id"""
+        unknown = set(changes) - {"type", "amount", "category", "description", "date"}
+        if unknown:
+            raise ValueError(f"Cannot update fields: {', '.join(sorted(unknown))}")
+        if not changes:
+            return self.get(transaction_id) is not None
+        assignments = ", ".join(f"{column} = ?" for column in changes)
+        with self._connect() as conn:
+            cursor = conn.execute(
+                f"UPDATE transactions SET {assignments} WHERE uid = ?",
+                (*changes.values(), transaction_id)
+            )
+            self._bump(conn)
+        return cursor.rowcount > 0
+
+    def get(self, transaction_id):
+        """Get a transaction by id, or None"""
+        rows = self._rows(f"SELECT {self.COLUMNS} FROM transactions WHERE uid = ?", (transaction_id,))
+        return rows[0] if rows else None
+
+    def transactions_between(self, start, end):
+        """Get transactions with start <= date < end using the date index"""
+        return self._rows(
+            f"SELECT {self.COLUMNS} FROM transactions WHERE date >= ? AND date < ? ORDER BY date, id",
+            (start, end)
+        )
+
+    def recent_transactions(self, limit):
+        """Get the latest transactions by date, newest first"""
+        return self._rows(
+            f"SELECT {self.COLUMNS} FROM transactions ORDER BY date DESC, id DESC LIMIT ?", (limit,)
+        )
+
+    def page(self, filters, sort, descending, after, limit):
+        """Get up to limit transactions matching filters, after a cursor key
+
+        Pages are read with the (date, uid) or (amount, uid) index, so each
+        costs the same no matter how deep into the ledger it is.
+        """
+        column = "date" if sort == "date" else "amount"
+        clauses = []
+        params = []
+        for name, clause in (("start", "date >= ?"), ("end", "date < ?"), ("type", "type = ?"),
+                             ("category", "category = ?"), ("min_cents", "amount >= ?"),
+                             ("max_cents", "amount <= ?")):
+            if name in filters:
+                clauses.append(clause)
+                params.append(filters[name] / 100 if name.endswith("_cents") else filters[name])
+        if after is not None:
+            clauses.append(f"({column}, uid) {'<' if descending else '>'} (?, ?)")
+            params.extend((after[0] / 100 if sort == "amount" else after[0], after[1]))
+        order = "DESC" if descending else "ASC"
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return self._rows(
+            f"SELECT {self.COLUMNS} FROM transactions{where} ORDER BY {column} {order}, uid {order} LIMIT ?",
+            (*params, limit)
+        )
+
+    def totals(self, start=None, end=None):
+        """Sum income and expenses, optionally within a date range"""
+        sql = """
+            SELECT COUNT(*) AS count,
+                   COALESCE(SUM(CASE WHEN type = 'income' THEN {cents} END), 0) / 100.0 AS income,
+                   COALESCE(SUM(CASE WHEN type != 'income' THEN {cents} END), 0) / 100.0 AS expenses
+            FROM transactions
+        """.format(cents=self.CENTS)
+        params = ()
+        if start is not None and end is not None:
+            sql += " WHERE date >= ? AND date < ?"
+            params = (start, end)
+        return self._rows(sql, params)[0]
+
+    def category_totals(self, start=None, end=None, transaction_type='expense'):
+        """Sum amounts per category, optionally within a date range, largest first"""
+        sql = "SELECT category, SUM({cents}) / 100.0 AS amount FROM transactions WHERE type = ?".format(
+            cents=self.CENTS)
+        params = (transaction_type,)
+        if start is not None and end is not None:
+            sql += " AND date >= ? AND date < ?"
+            params += (start, end)
+        rows = self._connect().execute(sql + " GROUP BY category ORDER BY amount DESC", params)
+        return [(row["category"], row["amount"]) for row in rows]
+
+    def month_rollup(self, start, end):
+        """Sum and count per type and category within a date range"""
+        rows = self._connect().execute(
+            """
+            SELECT type, category, SUM({cents}) / 100.0 AS amount, COUNT(*) AS count
+            FROM transactions
+            WHERE date >= ? AND date < ?
+            GROUP BY type, category
+            """.format(cents=self.CENTS),
+            (start, end)
+        )
+        rollup = {}
+        for row in rows:
+            rollup.setdefault(row["type"], {})[row["category"]] = [row["amount"], row["count"]]
+        return rollup
+
+    @staticmethod
+    def _bump(conn):
+        conn.execute("UPDATE ledger_version SET version = version + 1 WHERE id = 0")
+
+    def _insert(self, conn, transactions):
+        conn.executemany(
+            f"INSERT INTO transactions ({self.INSERT_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                (t.get("id") or new_transaction_id(), t["type"], float(t["amount"]),
+                 t["category"], t.get("description", ""), t["date"])
+                for t in transactions
+            )
+        )
+
+
+def _next_month(month):
+    """Return the 'YYYY-MM' key after the given one"""
+    year, number = int(month[:4]), int(month[5:7])
+    return f"{year + 1}-01" if number == 12 else f"{year}-{number + 1:02d}"
+
+
+def _matches(transaction, filters):
+    """Check a transaction dictionary against query filters"""
+    return (
+        ("start" not in filters or transaction["date"] >= filters["start"])
+        and ("end" not in filters or transaction["date"] < filters["end"])
+        and ("type" not in filters or transaction["type"] == filters["type"])
+        and ("category" not in filters or transaction["category"] == filters["category"])
+        and ("min_cents" not in filters or to_cents(transaction["amount"]) >= filters["min_cents"])
+        and ("max_cents" not in filters or to_cents(transaction["amount"]) <= filters["max_cents"])
+    )
+
+
+class ShardedStorage:
+    """Stores the ledger as one JSON-lines shard per month
+
+    Shards live at ``<root>/<YYYY>/<MM>.jsonl`` and use the same entry
+    format as the journal (add, update and delete entries), so a write
+    appends one line to the shard of the transaction's month.  A small
+    ``manifest.json`` lists the months that have shards.  Range queries and
+    aggregates read only the shards overlapping the range; parsed shards
+    and their per-category sums are cached until the shard file changes.
+    """
+
+    native_queries = True
+
+    def __init__(self, root, shard_cache_size=24, commit_window=0.0):
+        self.root = root
+        self.manifest_path = os.path.join(root, "manifest.json")
+        self.shard_cache_size = shard_cache_size
+        self._shards = OrderedDict()
+        self._summaries = {}
+        self._month_of = None
+        self._month_of_signature = None
+        self._dirty = set()
+        os.makedirs(root, exist_ok=True)
+        self.lock = FileLock(os.path.join(root, ".lock"))
+        self._group = GroupCommit(self._sync_dirty, commit_window)
+
+    # Common storage interface
+
+    def load(self):
+        """Load every shard in month order"""
+        transactions = []
+        for month in self._months():
+            transactions.extend(self._shard(month).values())
+        return {"transactions": transactions}
+
+    def signature(self):
+        """Identify the current on-disk state of the ledger"""
+        return (file_signature(self.manifest_path),) + tuple(
+            file_signature(self._path(month)) for month in self._months()
+        )
+
+    def save(self, data):
+        """Rewrite every shard from the given transactions"""
+        assign_missing_ids(data["transactions"])
+        by_month = {}
+        for transaction in data["transactions"]:
+            by_month.setdefault(transaction["date"][:7], []).append(transaction)
+
+        with self.lock:
+            for month in set(self._months()) - set(by_month):
+                os.remove(self._path(month))
+            for month, transactions in by_month.items():
+                self._write_shard(month, transactions)
+            self._write_manifest(sorted(by_month))
+            self._shards.clear()
+            self._summaries.clear()
+            self._month_of = {t["id"]: t["date"][:7] for t in data["transactions"]}
+            self._month_of_signature = self.signature()
+
+    def commit(self):
+        """Wait until shard entries written so far are on disk"""
+        self._group.commit()
+
+    def append(self, transaction):
+        """Append an add entry to the transaction's month shard"""
+        self.append_many([transaction])
+
+    def append_many(self, transactions):
+        """Append add entries with one write per month shard touched"""
+        by_month = {}
+        for transaction in transactions:
+            by_month.setdefault(transaction["date"][:7], []).append(transaction)
+        with self.lock:
+            for month, entries in by_month.items():
+                self._write_entries(month, [{"op": "add", "transaction": t} for t in entries])
+                if self._month_of is not None:
+                    self._month_of.update((t["id"], month) for t in entries)
+
+    def delete(self, transaction_id):
+        """Append a tombstone to the shard holding the transaction"""
+        with self.lock:
+            month = self._find(transaction_id)
+            if month is None:
+                return False
+            self._write_entry(month, {"op": "delete", "id": transaction_id})
+            del self._month_of[transaction_id]
+            return True
+
+    def update(self, transaction_id, changes):
+        """Append an update entry, moving the transaction if its month changes"""
+        with self.lock:
+            month = self._find(transaction_id)
+            if month is None:
+                return False
+            new_month = changes.get("date", f"{month}-")[:7]
+            if new_month == month:
+                self._write_entry(month, {"op": "update", "id": transaction_id, "changes": changes})
+            else:
+                transaction = {**self._shard(month)[transaction_id], **changes}
+                self.delete(transaction_id)
+                self.append(transaction)
+            return True
+
+    def get(self, transaction_id):
+        """Get a transaction by id, or None"""
+        with self.lock:
+            month = self._find(transaction_id)
+            return dict(self._shard(month)[transaction_id]) if month else None
+
+    # Native queries
+
+    def transactions_between(self, start, end):
+        """Get transactions with start <= date < end, reading only overlapping shards"""
+        transactions = []
+        for month in self._months_between(start, end):
+            transactions.extend(t for t in self._shard(month).values() if start <= t["date"] < end)
+        transactions.sort(key=lambda t: (t["date"], t["id"]))
+        return transactions
+
+    def recent_transactions(self, limit):
+        """Get the latest transactions by date, reading shards from the newest month"""
+        transactions = []
+        for month in reversed(self._months()):
+            if len(transactions) >= limit:
+                break
+            shard = sorted(self._shard(month).values(), key=lambda t: (t["date"], t["id"]), reverse=True)
+            transactions.extend(shard[:limit - len(transactions)])
+        return transactions
+
+    def page(self, filters, sort, descending, after, limit):
+        """Get up to limit transactions matching filters, after a cursor key
+
+        Date order walks the shards from the cursor's month and stops once
+        the page is full, so a page reads only the months it returns.
+        Amounts are not indexed across shards, so amount order reads every
+        month within the date filter.
+        """
+        if sort == "date":
+            key = lambda t: (t["date"], t["id"])
+        else:
+            key = lambda t: (to_cents(t["amount"]), t["id"])
+        months = self._months_between(filters.get("start", "0000-01-01"), filters.get("end", "9999-12-31"))
+        if descending:
+            months.reverse()
+
+        transactions = []
+        for month in months:
+            if sort == "date":
+                if after is not None and (month > after[0][:7] if descending else month < after[0][:7]):
+                    continue
+                if len(transactions) >= limit:
+                    break
+            transactions.extend(
+                t for t in self._shard(month).values()
+                if _matches(t, filters) and (
+                    after is None or (key(t) < tuple(after) if descending else key(t) > tuple(after)))
+            )
+        select = heapq.nlargest if descending else heapq.nsmallest
+        return [dict(t) for t in select(limit, transactions, key=key)]
+
+    def month_rollup(self, start, end):
+        """Sum and count per type and category within a date range"""
+        rollup = {}
+        for month in self._months_between(start, end):
+            for transaction_type, categories in self._summary(month, start, end).items():
+                target = rollup.setdefault(transaction_type, {})
+                for category, (cents, count) in categories.items():
+                    entry = target.setdefault(category, [0, 0])
+                    entry[0] += cents
+                    entry[1] += count
+        for categories in rollup.values():
+            for entry in categories.values():
+                entry[0] = entry[0] / 100
+        return rollup
+
+    def totals(self, start=None, end=None):
+        """Sum income and expenses, optionally within a date range"""
+        if start is None or end is None:
+            start, end = "0000-01-01", "9999-12-31"
+        income = expenses = count = 0
+        for month in self._months_between(start, end):
+            for transaction_type, categories in self._summary(month, start, end).items():
+                for cents, entries in categories.values():
+                    if transaction_type == "income":
+                        income += cents
+                    else:
+                        expenses += cents
+                    count += entries
+        return {"count": count, "income": income / 100, "expenses": expenses / 100}
+
+    def category_totals(self, start=None, end=None, transaction_type='expense'):
+        """Sum amounts per category, optionally within a date range, largest first"""
+        if start is None or end is None:
+            start, end = "0000-01-01", "9999-12-31"
+        categories = self.month_rollup(start, end).get(transaction_type, {})
+        return sorted(
+            ((category, entry[0]) for category, entry in categories.items()),
+            key=lambda item: item[1], reverse=True
+        )
+
+    # Shards
+
+    def _path(self, month):
+        return os.path.join(self.root, month[:4], f"{month[5:7]}.jsonl")
+
+    def _months(self):
+        if not os.path.exists(self.manifest_path):
+            return []
+        with open(self.manifest_path, 'r') as f:
+            return json.load(f)["months"]
+
+    def _months_between(self, start, end):
+        return [
+            month for month in self._months()
+            if f"{month}-01" < end and f"{_next_month(month)}-01" > start
+        ]
+
+    def _shard(self, month):
+        """Return {id: transaction} for a month, parsed once per file change"""
+        with self.lock:
+            signature = file_signature(self._path(month))
+            cached = self._shards.get(month)
+            if cached is not None and cached[0] == signature:
+                self._shards.move_to_end(month)
+                return cached[1]
+
+            records = {}
+            entries = 0
+            for entry in read_entries(self._path(month)):
+                JournalStorage._apply(records, entry)
+                entries += 1
+            if entries > 2 * len(records) + 64:
+                # Mostly tombstones and updates: rewrite the shard compactly
+                self._write_shard(month, list(records.values()))
+                signature = file_signature(self._path(month))
+
+            self._shards[month] = (signature, records)
+            while len(self._shards) > self.shard_cache_size:
+                self._shards.popitem(last=False)
+            return records
+
+    def _summary(self, month, start, end):
+        """Return {type: {category: [cents, count]}} for the part of a month in range"""
+        whole_month = f"{month}-01" >= start and f"{_next_month(month)}-01" <= end
+        signature = file_signature(self._path(month))
+        if whole_month:
+            cached = self._summaries.get(month)
+            if cached is not None and cached[0] == signature:
+                return cached[1]
+
+        summary = {}
+        for transaction in self._shard(month).values():
+            if whole_month or start <= transaction["date"] < end:
+                categories = summary.setdefault(transaction["type"], {})
+                entry = categories.setdefault(transaction["category"], [0, 0])
+                entry[0] += to_cents(transaction["amount"])
+                entry[1] += 1
+        if whole_month:
+            self._summaries[month] = (signature, summary)
+        return summary
+
+    def _find(self, transaction_id):
+        """Return the month whose shard holds a transaction, or None
+
+        The id -> month index is only updated by this process's writes, so a
+        hit is checked against the shard and a miss rebuilds the index if
+        another process has written since it was built.
+        """
+        month = self._month_index().get(transaction_id)
+        if month is not None and transaction_id in self._shard(month):
+            return month
+        if self._month_of_signature != self.signature():
+            self._month_of = None
+            month = self._month_index().get(transaction_id)
+        return month
+
+    def _month_index(self):
+        if self._month_of is None:
+            self._month_of_signature = self.signature()
+            self._month_of = {}
+            for month in self._months():
+                for transaction_id in self._shard(month):
+                    self._month_of[transaction_id] = month
+        return self._month_of
+
+    def _write_entry(self, month, entry):
+        self._write_entries(month, [entry])
+
+    def _write_entries(self, month, entries):
+        path = self._path(month)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._write_manifest(sorted(set(self._months()) | {month}))
+        append_entries(path, entries)
+        self._dirty.add(path)
+        self._group.written()
+
+    def _sync_dirty(self):
+        with self.lock:
+            paths, self._dirty = self._dirty, set()
+        for path in paths:
+            if os.path.exists(path):
+                fsync_path(path)
+
+    def _write_shard(self, month, transactions):
+        path = self._path(month)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_atomic(path, lambda f: f.writelines(
+            json.dumps({"op": "add", "transaction": transaction}, separators=(',', ':')) + "\n"
+            for transaction in transactions
+        ))
+
+    def _write_manifest(self, months):
+        write_atomic(self.manifest_path, lambda f: json.dump({"months": months}, f))
+
+
+def _load_for_migration(json_path):
+    """Load a JSON ledger with every transaction in the form the app writes
+
+    Older ledgers may hold dates without zero padding or amounts with more
+    than two decimals; the backends compare dates as strings and amounts as
+    cents, so rows are normalized on the way in.  Unreadable rows are
+    skipped, as they are when the ledger is loaded.
+    """
+    from app.models import Ledger  # app.models imports this module
+    data = JournalStorage(json_path).load()
+    return {**data, "transactions": Ledger(data["transactions"]).transactions()}
+
+
+def migrate_json_to_sqlite(json_path, sqlite_path):
+    """Copy every transaction from a JSON ledger into a SQLite database"""
+    data = _load_for_migration(json_path)
+    storage = SQLiteStorage(sqlite_path)
+    storage.save(data)
+    return len(data["transactions"])
+
+
+def migrate_json_to_shards(json_path, shard_dir):
+    """Split a JSON ledger into per-month shards"""
+    data = _load_for_migration(json_path)
+    ShardedStorage(shard_dir).save(data)
+    return len(data["transactions"])
+
+
+def create_storage(config):
+    """Create the storage backend selected by the configuration"""
+    backend = config.get('STORAGE_BACKEND', 'json')
+    path = config.get('DATA_FILE', 'budget_data.json')
+
+    if backend == 'json':
+        return JSONStorage(path)
+    if backend == 'journal':
+        return JournalStorage(
+            path,
+            compact_min_entries=config.get('JOURNAL_COMPACT_MIN_ENTRIES', 1000),
+            compact_ratio=config.get('JOURNAL_COMPACT_RATIO', 1.0),
+            commit_window=config.get('COMMIT_WINDOW', 0.0)
+        )
+    if backend == 'sqlite':
+        return SQLiteStorage(config.get('SQLITE_FILE', 'budget_data.db'))
+    if backend == 'sharded':
+        return ShardedStorage(config.get('SHARD_DIR', 'data'), commit_window=config.get('COMMIT_WINDOW', 0.0))
+    raise ValueError(f"Unknown storage backend: {backend}")
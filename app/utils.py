@@ -1,50 +1,259 @@
 """
 Utility functions for Budget Tracker
 """
-import pandas as pd
-import matplotlib
-matplotlib.use('Agg')  # Use non-interactive backend
-import matplotlib.pyplot as plt
 from io import BytesIO, StringIO
 import base64
-from app.models import BudgetDatabase
-from datetime import datetime
+import csv
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import zipfile
+from collections import OrderedDict
+from functools import wraps
+from app.charts import chart_renderer, sprite_sheet
+from app.models import BudgetDatabase, from_cents, month_bounds, period_bounds, to_cents
+from datetime import date, datetime
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
 
+class MonthMemo:
+    """LRU cache of per-month results shared by the helpers in this module
+
+    Entries are keyed by (ledger version, helper, year, month), so a write
+    to the ledger makes every older entry unreachable and they age out
+    through LRU eviction.  Cached values are shared: callers must treat
+    them as read-only.
+    """
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, name, year, month, compute):
+        """Return the cached result for a helper and month, computing it on a miss"""
+        key = (BudgetDatabase.ledger_version(), name, year, month)
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            self.misses += 1
+
+        value = compute()
+        with self.lock:
+            self.entries[key] = value
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        """Drop every cached result"""
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        """Return memo counters"""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.entries)}
+
+month_memo = MonthMemo()
+
+class ChartCache:
+    """LRU cache of rendered chart images, bounded by total bytes
+
+    Keys are (chart, year, month, rendering options, data hash), where the
+    hash covers exactly the numbers a chart is drawn from, so a chart is
+    rendered again only when its own month's aggregates change.  When ``spill_dir`` is set,
+    images evicted from memory are written there and read back on a later
+    miss; the directory is trimmed to ``max_disk_bytes``, oldest first.
+    """
+    def __init__(self, max_bytes=32 * 1024 * 1024, spill_dir=None, max_disk_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get(self, key, render):
+        """Return the image bytes for a key, calling render() on a miss"""
+        return self.get_many([key], lambda keys: [render()])[0]
+
+    def get_many(self, keys, render_many):
+        """Return the images for several keys in order
+
+        Every miss is rendered by a single render_many(missing_keys) call,
+        which returns their images in the same order.
+        """
+        images = {key: self._find(key) for key in keys}
+        missing = [key for key, image in images.items() if image is None]
+        if missing:
+            for key, image in zip(missing, render_many(missing)):
+                images[key] = image
+                self._store(key, image)
+        return [images[key] for key in keys]
+
+    def clear(self):
+        """Drop every image held in memory"""
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def stats(self):
+        """Return cache counters"""
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "size": len(self.entries),
+            "bytes": self.size
+        }
+
+    def _find(self, key):
+        with self.lock:
+            image = self.entries.get(key)
+            if image is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return image
+
+        image = self._read_spill(key)
+        with self.lock:
+            if image is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+        self._store(key, image)
+        return image
+
+    def _store(self, key, image):
+        evicted = []
+        with self.lock:
+            if key not in self.entries:
+                self.entries[key] = image
+                self.size += len(image)
+            while self.size > self.max_bytes and self.entries:
+                old_key, old_image = self.entries.popitem(last=False)
+                self.size -= len(old_image)
+                evicted.append((old_key, old_image))
+        for old_key, old_image in evicted:
+            self._spill(old_key, old_image)
+
+    def _spill_path(self, key):
+        name = hashlib.blake2b(repr(key).encode(), digest_size=16).hexdigest()
+        return os.path.join(self.spill_dir, f"{name}.img")
+
+    def _read_spill(self, key):
+        if not self.spill_dir:
+            return None
+        path = self._spill_path(key)
+        try:
+            with open(path, 'rb') as f:
+                image = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return image
+
+    def _spill(self, key, image):
+        if not self.spill_dir:
+            return
+        os.makedirs(self.spill_dir, exist_ok=True)
+        path = self._spill_path(key)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(image)
+        os.replace(tmp_path, path)
+
+        files = [entry for entry in os.scandir(self.spill_dir) if entry.name.endswith('.img')]
+        total = sum(entry.stat().st_size for entry in files)
+        for entry in sorted(files, key=lambda entry: entry.stat().st_mtime):
+            if total <= self.max_disk_bytes:
+                break
+            total -= entry.stat().st_size
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+
+chart_cache = ChartCache()
+
+def _data_hash(data):
+    """Hash the JSON form of chart data or of a chart cache key"""
+    return hashlib.blake2b(json.dumps(data).encode(), digest_size=8).hexdigest()
+
+def _data_uri(image):
+    return f"data:image/png;base64,{base64.b64encode(image).decode()}"
+
+def memoize_month(func):
+    """Memoize a (year, month) helper in the shared month memo"""
+    @wraps(func)
+    def wrapper(year, month):
+        return month_memo.get(func.__name__, year, month, lambda: func(year, month))
+    return wrapper
+
+@memoize_month
+def get_month_rollup(year, month):
+    """Get {type: {category: [amount, count]}} for a month"""
+    return BudgetDatabase.get_month_rollup(year, month)
+
+def _expense_categories(rollup):
+    """Return (category, amount) pairs from a month rollup, largest first"""
+    spending = [(category, entry[0]) for category, entry in rollup.get('expense', {}).items()]
+    spending.sort(key=lambda item: item[1], reverse=True)
+    return spending
+
+@memoize_month
 def get_monthly_summary(year, month):
     """Get income and expense summary for a specific month"""
-    monthly_data = BudgetDatabase.get_transactions_by_month(year, month)
-    
-    if monthly_data is None or monthly_data.empty:
+    return _summarize_rollup(get_month_rollup(year, month))
+
+def _summarize_rollup(rollup):
+    """Total income, expenses and balance from a month rollup, or None if it is empty"""
+    if not rollup:
         return None
     
-    income = monthly_data[monthly_data['type'] == 'income']['amount'].sum()
-    expenses = monthly_data[monthly_data['type'] == 'expense']['amount'].sum()
-    balance = income - expenses
+    income, expenses = _rollup_cents(rollup)
     
     return {
-        "income": float(income),
-        "expenses": float(expenses),
-        "balance": float(balance),
-        "data": monthly_data
+        "income": from_cents(income),
+        "expenses": from_cents(expenses),
+        "balance": from_cents(income - expenses)
     }
 
+def _rollup_cents(rollup):
+    """Total income and expenses of a month rollup, in integer cents"""
+    income = sum(to_cents(entry[0]) for entry in rollup.get('income', {}).values())
+    expenses = sum(
+        to_cents(entry[0])
+        for transaction_type, categories in rollup.items() if transaction_type != 'income'
+        for entry in categories.values()
+    )
+    return income, expenses
+
+@memoize_month
 def get_category_analysis(year, month):
     """Analyze spending by category"""
-    summary = get_monthly_summary(year, month)
-    if summary is None:
+    rollup = get_month_rollup(year, month)
+    if not rollup:
         return None
     
-    monthly_data = summary['data']
-    expenses = monthly_data[monthly_data['type'] == 'expense']
+    category_spending = _expense_categories(rollup)
     
-    if expenses.empty:
+    if not category_spending:
         return []
     
-    category_spending = expenses.groupby('category')['amount'].sum().sort_values(ascending=False)
-    total_expenses = category_spending.sum()
+    total_expenses = sum(amount for _, amount in category_spending)
     
     categories = []
-    for category, amount in category_spending.items():
+    for category, amount in category_spending:
         percentage = (amount / total_expenses) * 100
         categories.append({
             "category": category,
@@ -54,126 +263,395 @@ def get_category_analysis(year, month):
     
     return categories
 
-def generate_category_chart(year, month):
-    """Generate category pie chart as base64 image"""
-    summary = get_monthly_summary(year, month)
-    if summary is None:
-        return None
+def get_range_summary(start, end):
+    """Get income, expenses, balance and category spending for any date range
     
-    monthly_data = summary['data']
-    expenses = monthly_data[monthly_data['type'] == 'expense']
-    
-    if expenses.empty:
+    start is inclusive and end exclusive, both 'YYYY-MM-DD'.
+    """
+    transactions = BudgetDatabase.get_transactions_between(start, end)
+    if not transactions:
         return None
     
-    category_spending = expenses.groupby('category')['amount'].sum().sort_values(ascending=False)
-    
-    plt.figure(figsize=(10, 6))
-    colors = plt.cm.Set3(range(len(category_spending)))
-    plt.pie(category_spending.values, labels=category_spending.index, autopct='%1.1f%%', 
-            startangle=90, colors=colors)
-    plt.title(f'Category-wise Spending - {year}-{month:02d}', fontsize=14, fontweight='bold')
-    plt.tight_layout()
+    # Summed in integer cents so totals do not drift with float rounding
+    income = 0
+    expenses = 0
+    category_spending = {}
+    for transaction in transactions:
+        cents = to_cents(transaction['amount'])
+        if transaction['type'] == 'income':
+            income += cents
+        else:
+            expenses += cents
+            if transaction['type'] == 'expense':
+                category = transaction['category']
+                category_spending[category] = category_spending.get(category, 0) + cents
     
-    img = BytesIO()
-    plt.savefig(img, format='png', dpi=100, bbox_inches='tight')
-    img.seek(0)
-    plt.close()
+    categories = []
+    for category, cents in sorted(category_spending.items(), key=lambda item: item[1], reverse=True):
+        categories.append({
+            "category": category,
+            "amount": from_cents(cents),
+            "percentage": cents / expenses * 100
+        })
     
-    img_base64 = base64.b64encode(img.getvalue()).decode()
-    return f"data:image/png;base64,{img_base64}"
+    return {
+        "start": start,
+        "end": end,
+        "count": len(transactions),
+        "income": from_cents(income),
+        "expenses": from_cents(expenses),
+        "balance": from_cents(income - expenses),
+        "categories": categories
+    }
+
+def get_quarterly_summary(year, quarter):
+    """Get the range summary for a calendar quarter (1-4)"""
+    first_month = (quarter - 1) * 3 + 1
+    return get_range_summary(*period_bounds('quarter', f"{year}-{first_month:02d}-01"))
+
+TREND_GROUPS = ('month', 'quarter', 'year')
+
+def _parse_month(value, name):
+    """Parse a 'YYYY-MM' string into (year, month)"""
+    try:
+        parsed = datetime.strptime(value, "%Y-%m")
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be a month in YYYY-MM format") from None
+    return parsed.year, parsed.month
+
+def _period_label(year, month, group):
+    """Label a month as '2025-10', '2025-Q4' or '2025'"""
+    if group == 'year':
+        return f"{year}"
+    if group == 'quarter':
+        return f"{year}-Q{(month - 1) // 3 + 1}"
+    return f"{year}-{month:02d}"
+
+def _period_totals(months, group, shift=0):
+    """Sum the rollups of a range of months (counted from year 0) by period
+
+    Returns {label: {"income", "expenses", "count", "categories"}} in
+    integer cents, in month order.  ``shift`` moves the labels by a number
+    of months, so a year-earlier range can be keyed by the periods it is
+    compared with.
+    """
+    periods = {}
+    for index in months:
+        year, month = divmod(index, 12)
+        rollup = get_month_rollup(year, month + 1)
+        label_year, label_month = divmod(index + shift, 12)
+        label = _period_label(label_year, label_month + 1, group)
+        totals = periods.setdefault(label, {"income": 0, "expenses": 0, "count": 0, "categories": {}})
+        income, expenses = _rollup_cents(rollup)
+        totals["income"] += income
+        totals["expenses"] += expenses
+        totals["count"] += sum(entry[1] for categories in rollup.values() for entry in categories.values())
+        for category, entry in rollup.get('expense', {}).items():
+            totals["categories"][category] = totals["categories"].get(category, 0) + to_cents(entry[0])
+    return periods
+
+def get_trends(start_month, end_month, group='month'):
+    """Get income, expense, balance and per-category series by period
+
+    Covers the months start_month through end_month ('YYYY-MM', inclusive)
+    grouped by month, quarter or year, with year-over-year changes against
+    the same months a year earlier.  Every month is read from its memoized
+    rollup, as the monthly report is, and summed in integer cents.
+    """
+    if group not in TREND_GROUPS:
+        raise ValueError(f"group must be one of: {', '.join(TREND_GROUPS)}")
+    start_year, start_mon = _parse_month(start_month, "from")
+    end_year, end_mon = _parse_month(end_month, "to")
+    first = start_year * 12 + start_mon - 1
+    last = end_year * 12 + end_mon - 1
+    if first > last:
+        raise ValueError("from must not be after to")
+
+    current = _period_totals(range(first, last + 1), group)
+    previous = _period_totals(range(first - 12, last - 11), group, shift=12)
+    labels = list(current)
+
+    def values(periods, key):
+        return [periods[label][key] for label in labels]
+
+    def balance(periods):
+        return [income - expenses for income, expenses in zip(values(periods, "income"), values(periods, "expenses"))]
+
+    def amounts(cents):
+        return [from_cents(value) for value in cents]
+
+    def year_over_year(now, before):
+        return {
+            "previous": amounts(before),
+            "change": amounts(a - b for a, b in zip(now, before)),
+            "percent": [(a - b) / abs(b) * 100 if b else None for a, b in zip(now, before)]
+        }
+
+    # Only categories spent on within the range get a series
+    category_totals = {}
+    for label in labels:
+        for category, cents in current[label]["categories"].items():
+            category_totals[category] = category_totals.get(category, 0) + cents
+    categories = sorted(category_totals, key=category_totals.get, reverse=True)
+
+    return {
+        "from": start_month,
+        "to": end_month,
+        "group": group,
+        "periods": labels,
+        "count": values(current, "count"),
+        "income": amounts(values(current, "income")),
+        "expenses": amounts(values(current, "expenses")),
+        "balance": amounts(balance(current)),
+        "categories": {
+            category: amounts(current[label]["categories"].get(category, 0) for label in labels)
+            for category in categories
+        },
+        "year_over_year": {
+            "income": year_over_year(values(current, "income"), values(previous, "income")),
+            "expenses": year_over_year(values(current, "expenses"), values(previous, "expenses")),
+            "balance": year_over_year(balance(current), balance(previous))
+        }
+    }
+
+# Image formats charts can be rendered in, with their MIME types
+CHART_FORMATS = {'png': 'image/png', 'svg': 'image/svg+xml'}
+
+def generate_category_chart(year, month):
+    """Generate category pie chart as base64 image"""
+    chart = chart_image('category', year, month)
+    return None if chart is None else _data_uri(chart[1]())
 
 def generate_income_vs_expense_chart(year, month):
     """Generate income vs expense bar chart as base64 image"""
-    summary = get_monthly_summary(year, month)
-    if summary is None:
+    chart = chart_image('income-vs-expense', year, month)
+    return None if chart is None else _data_uri(chart[1]())
+
+def chart_image(chart, year, month, fmt='png', width=None, height=None, dpi=100):
+    """Look up a chart for a month in the chart cache
+
+    ``width`` and ``height`` are in pixels and default to the chart's usual
+    size at the given dpi.  Returns (etag, image) where image() returns the
+    image bytes, rendering them in the chart process pool on a cache miss,
+    or None when the month has nothing to plot.  The etag changes only when
+    the plotted numbers or the rendering options do.  image() raises
+    TimeoutError if the pool is saturated or the render is too slow.
+    """
+    data_for, (default_width, default_height) = CHARTS[chart]
+    data = data_for(year, month)
+    if data is None:
         return None
-    
-    income = summary['income']
-    expenses = summary['expenses']
-    
-    categories = ['Income', 'Expenses']
-    amounts = [income, expenses]
-    colors = ['#2ecc71', '#e74c3c']
-    
-    plt.figure(figsize=(8, 5))
-    bars = plt.bar(categories, amounts, color=colors, width=0.5)
-    plt.ylabel('Amount ($)', fontsize=12)
-    plt.title(f'Income vs Expenses - {year}-{month:02d}', fontsize=14, fontweight='bold')
-    plt.grid(axis='y', alpha=0.3)
-    
-    for bar, amount in zip(bars, amounts):
-        height = bar.get_height()
-        plt.text(bar.get_x() + bar.get_width()/2., height,
-                f'${amount:.2f}', ha='center', va='bottom', fontweight='bold')
-    
-    plt.tight_layout()
-    
-    img = BytesIO()
-    plt.savefig(img, format='png', dpi=100, bbox_inches='tight')
-    img.seek(0)
-    plt.close()
-    
-    img_base64 = base64.b64encode(img.getvalue()).decode()
-    return f"data:image/png;base64,{img_base64}"
 
-def check_budget_alert():
-    """Check if expenses exceed income and return alert status"""
-    data = BudgetDatabase.load_data()
-    if not data["transactions"]:
-        return {"alert": False, "message": "", "income": 0, "expenses": 0}
+    figsize = (width / dpi if width else default_width, height / dpi if height else default_height)
+    key = _chart_key(chart, year, month, data, fmt, figsize, dpi)
+    etag = _data_hash(key)
+    return etag, lambda: chart_cache.get(
+        key, lambda: chart_renderer.render(chart, year, month, data, fmt, figsize, dpi)
+    )
+
+def get_year_charts(year):
+    """Render the category and income vs expense charts of every month of a
+    year in one pass
+
+    The year is read and grouped by month once, charts already in the
+    chart cache are reused and the rest are rendered concurrently in the
+    chart process pool.  Returns {month: {chart: PNG bytes}} for months
+    with transactions; raises TimeoutError if the pool cannot keep up.
+    """
+    jobs = {}
+    for month, rollup in sorted(BudgetDatabase.get_year_rollups(year).items()):
+        summary = _summarize_rollup(rollup)
+        month_data = {
+            'category': _expense_categories(rollup) or None,
+            'income-vs-expense': None if summary is None else [summary['income'], summary['expenses']],
+        }
+        for chart, data in month_data.items():
+            if data is not None:
+                figsize = CHARTS[chart][1]
+                key = _chart_key(chart, year, month, data, 'png', figsize, 100)
+                jobs[key] = (chart, year, month, data, 'png', figsize, 100)
+
+    keys = list(jobs)
+    images = chart_cache.get_many(
+        keys, lambda missing: chart_renderer.render_many([jobs[key] for key in missing])
+    )
+    charts = {}
+    for key, image in zip(keys, images):
+        chart, _, month = key[:3]
+        charts.setdefault(month, {})[chart] = image
+    return charts
+
+def _chart_key(chart, year, month, data, fmt, figsize, dpi):
+    """Chart cache key; the same for a chart however it was requested"""
+    return (chart, year, month, fmt, tuple(figsize), dpi, _data_hash(data))
+
+def get_chart_data(chart, year, month):
+    """Get the series a chart is drawn from, for rendering on the client
+
+    Returns {"labels", "values", "percentages", "total"}, with percentages
+    of the total, or None when the month has nothing to plot.
+    """
+    data_for, _ = CHARTS[chart]
+    data = data_for(year, month)
+    if data is None:
+        return None
+
+    if chart == 'category':
+        labels = [category for category, _ in data]
+        values = [amount for _, amount in data]
+    else:
+        labels = ['Income', 'Expenses']
+        values = data
+    total = from_cents(sum(to_cents(value) for value in values))
+    return {
+        "chart": chart,
+        "year": year,
+        "month": month,
+        "labels": labels,
+        "values": values,
+        "percentages": [round(value / total * 100, 2) if total else 0 for value in values],
+        "total": total
+    }
+
+def _category_chart_data(year, month):
+    return _expense_categories(get_month_rollup(year, month)) or None
+
+def _income_vs_expense_chart_data(year, month):
+    summary = get_monthly_summary(year, month)
+    return None if summary is None else [summary['income'], summary['expenses']]
+
+# chart name -> (data for a month or None, default size in inches); the
+# renderers are in app.charts
+CHARTS = {
+    'category': (_category_chart_data, (10, 6)),
+    'income-vs-expense': (_income_vs_expense_chart_data, (8, 5)),
+}
+
+ALERT_PERIOD_LABELS = {
+    'all': '',
+    'year': ' this year',
+    'quarter': ' this quarter',
+    'month': ' this month'
+}
+
+def check_budget_alert(period='all'):
+    """Check if expenses exceed income and return alert status
     
-    total_income = 0
-    total_expenses = 0
+    period is 'all' for lifetime totals, or 'year', 'quarter' or 'month' to
+    check only the current one.
+    """
+    if period not in ALERT_PERIOD_LABELS:
+        raise ValueError(f"Unknown period: {period}")
     
-    for transaction in data["transactions"]:
-        if transaction["type"] == "income":
-            total_income += float(transaction["amount"])
-        else:
-            total_expenses += float(transaction["amount"])
+    totals = BudgetDatabase.get_period_totals(period)
+    if totals["count"] == 0:
+        return {"alert": False, "message": "", "income": 0, "expenses": 0, "period": period}
+    
+    total_income = totals["income"]
+    total_expenses = totals["expenses"]
+    label = ALERT_PERIOD_LABELS[period]
     
     if total_expenses > total_income:
+        deficit = from_cents(to_cents(total_expenses) - to_cents(total_income))
         return {
             "alert": True,
-            "message": f"⚠️ WARNING: Your expenses (${total_expenses:.2f}) exceed your income (${total_income:.2f}) by ${total_expenses - total_income:.2f}!",
+            "message": f"⚠️ WARNING: Your expenses{label} (${total_expenses:.2f}) exceed your income (${total_income:.2f}) by ${deficit:.2f}!",
             "income": total_income,
             "expenses": total_expenses,
-            "deficit": total_expenses - total_income
+            "deficit": deficit,
+            "period": period
         }
     else:
-        remaining = total_income - total_expenses
+        remaining = from_cents(to_cents(total_income) - to_cents(total_expenses))
         return {
             "alert": False,
-            "message": f"✓ Good! You have ${remaining:.2f} remaining after expenses.",
+            "message": f"✓ Good! You have ${remaining:.2f} remaining after expenses{label}.",
             "income": total_income,
             "expenses": total_expenses,
-            "remaining": remaining
+            "remaining": remaining,
+            "period": period
         }
 
-def export_all_transactions_csv():
-    """Export all transactions to CSV format"""
-    transactions = BudgetDatabase.get_all_transactions()
-    
-    if not transactions:
+def get_dashboard(top=10, recent=10, period='all'):
+    """Get everything the dashboard shows in one response
+
+    Lifetime totals, the top spending categories with their share of all
+    expenses, the budget alert for the given period and the most recent
+    transactions.
+    """
+    totals = BudgetDatabase.get_totals()
+    expenses = totals["expenses"]
+    categories = BudgetDatabase.get_category_totals()[:top]
+    return {
+        "count": totals["count"],
+        "income": totals["income"],
+        "expenses": expenses,
+        "balance": from_cents(to_cents(totals["income"]) - to_cents(expenses)),
+        "top_categories": [
+            {
+                "category": category,
+                "amount": float(amount),
+                "percentage": float(amount / expenses * 100) if expenses else 0.0
+            }
+            for category, amount in categories
+        ],
+        "alert": check_budget_alert(period),
+        "recent_transactions": BudgetDatabase.get_recent_transactions(recent)
+    }
+
+# Columns of transaction CSV exports
+EXPORT_COLUMNS = ["id", "type", "amount", "category", "description", "date"]
+
+def _csv_text(rows):
+    """Format rows as CSV text"""
+    buffer = StringIO()
+    csv.writer(buffer, lineterminator='\n').writerows(rows)
+    return buffer.getvalue()
+
+def iter_transaction_pages(chunk_size=2000, start=None, end=None):
+    """Read transactions, newest first, as an iterator of lists of at most
+    chunk_size transactions
+
+    Each list is one cursor page read from storage, so memory use does not
+    grow with the ledger.  ``start`` and ``end`` optionally limit the dates
+    (end exclusive).  Returns None if no transactions match.
+    """
+    page = BudgetDatabase.query_transactions(limit=chunk_size, start=start, end=end)
+    if not page["transactions"]:
         return None
-    
-    df = pd.DataFrame(transactions)
-    df = df.sort_values('date', ascending=False)
-    
-    # Create CSV string
-    csv_buffer = StringIO()
-    df.to_csv(csv_buffer, index=False)
-    csv_content = csv_buffer.getvalue()
-    
-    return csv_content
+    return _pages(page, chunk_size, start, end)
+
+def _pages(page, chunk_size, start, end):
+    while True:
+        yield page["transactions"]
+        if page["next_cursor"] is None:
+            return
+        page = BudgetDatabase.query_transactions(
+            limit=chunk_size, cursor=page["next_cursor"], start=start, end=end
+        )
+
+def stream_transactions_csv(chunk_size=2000, start=None, end=None):
+    """Export transactions, newest first, as an iterator of CSV text chunks,
+    or None if there are none (see iter_transaction_pages)"""
+    pages = iter_transaction_pages(chunk_size, start, end)
+    if pages is None:
+        return None
+    return _prepend(_csv_text([EXPORT_COLUMNS]), (
+        _csv_text([transaction[column] for column in EXPORT_COLUMNS] for transaction in transactions)
+        for transactions in pages
+    ))
 
-def export_monthly_report_csv(year, month):
-    """Export monthly report to CSV format"""
+def export_all_transactions_csv(chunk_size=2000):
+    """Export all transactions to CSV format, as an iterator of text chunks"""
+    return stream_transactions_csv(chunk_size)
+
+def export_monthly_report_csv(year, month, chunk_size=2000):
+    """Export monthly report to CSV format, as an iterator of text chunks"""
     summary = get_monthly_summary(year, month)
     if summary is None:
         return None
     
-    monthly_data = summary['data']
+    transactions = stream_transactions_csv(chunk_size, *month_bounds(year, month))
     
     # Create summary section
     csv_lines = [
@@ -188,12 +666,11 @@ def export_monthly_report_csv(year, month):
         "TRANSACTIONS",
     ]
     
-    # Add transactions
-    df = monthly_data.sort_values('date', ascending=False)
-    csv_lines.append(df.to_csv(index=False))
-    
-    csv_content = "\n".join(csv_lines)
-    return csv_content
+    return _prepend("\n".join(csv_lines) + "\n", transactions or ())
+
+def _prepend(first, chunks):
+    yield first
+    yield from chunks
 
 def export_category_analysis_csv(year, month):
     """Export category analysis to CSV format"""
@@ -214,3 +691,132 @@ def export_category_analysis_csv(year, month):
     
     csv_content = "\n".join(csv_lines)
     return csv_content
+
+MONEY_FORMAT = '"$"#,##0.00'
+PERCENT_FORMAT = '0.0%'
+
+def _cell(sheet, value, number_format=None):
+    """Build a write-only cell, optionally with a number format"""
+    cell = WriteOnlyCell(sheet, value=value)
+    if number_format:
+        cell.number_format = number_format
+    return cell
+
+def _text(value):
+    """Drop control characters, which XLSX cannot store, from a string cell"""
+    return ILLEGAL_CHARACTERS_RE.sub("", value) if isinstance(value, str) else value
+
+def _save_workbook(workbook):
+    """Save a workbook to a temporary file and return the file, rewound"""
+    f = tempfile.TemporaryFile()
+    workbook.save(f)
+    f.seek(0)
+    return f
+
+def _append_summary(workbook, title, period, summary):
+    sheet = workbook.create_sheet("Summary")
+    sheet.append([title])
+    sheet.append([period])
+    sheet.append([])
+    for label, key in (("Total Income", "income"), ("Total Expenses", "expenses"), ("Balance", "balance")):
+        sheet.append([label, _cell(sheet, summary[key], MONEY_FORMAT)])
+
+def _append_categories(workbook, categories):
+    sheet = workbook.create_sheet("Categories")
+    sheet.append(["Category", "Amount", "Percentage"])
+    for cat in categories:
+        sheet.append([
+            _text(cat['category']),
+            _cell(sheet, cat['amount'], MONEY_FORMAT),
+            _cell(sheet, cat['percentage'] / 100, PERCENT_FORMAT)
+        ])
+
+def _append_transactions(workbook, pages):
+    sheet = workbook.create_sheet("Transactions")
+    sheet.append(EXPORT_COLUMNS)
+    for transactions in pages:
+        for transaction in transactions:
+            sheet.append([
+                _text(transaction["id"]), _text(transaction["type"]), transaction["amount"],
+                _text(transaction["category"]), _text(transaction["description"]),
+                date.fromisoformat(transaction["date"])
+            ])
+
+def export_all_transactions_xlsx(chunk_size=2000):
+    """Export all transactions to an XLSX workbook with a lifetime summary
+
+    The workbook is written in openpyxl's write-only mode, reading
+    transactions one page at a time, so memory stays bounded.  Returns a
+    temporary file holding the workbook, or None if there are no
+    transactions.
+    """
+    pages = iter_transaction_pages(chunk_size)
+    if pages is None:
+        return None
+    
+    totals = BudgetDatabase.get_totals()
+    workbook = Workbook(write_only=True)
+    _append_summary(workbook, "BUDGET TRANSACTIONS", "All time", {
+        "income": totals["income"],
+        "expenses": totals["expenses"],
+        "balance": from_cents(to_cents(totals["income"]) - to_cents(totals["expenses"]))
+    })
+    _append_transactions(workbook, pages)
+    return _save_workbook(workbook)
+
+def export_monthly_report_xlsx(year, month, chunk_size=2000):
+    """Export monthly report to an XLSX workbook with summary, category and
+    transaction sheets; returns a temporary file, or None"""
+    summary = get_monthly_summary(year, month)
+    if summary is None:
+        return None
+    
+    workbook = Workbook(write_only=True)
+    _append_summary(workbook, "MONTHLY BUDGET REPORT", f"Month: {year}-{month:02d}", summary)
+    _append_categories(workbook, get_category_analysis(year, month) or [])
+    _append_transactions(workbook, iter_transaction_pages(chunk_size, *month_bounds(year, month)) or ())
+    return _save_workbook(workbook)
+
+def export_category_analysis_xlsx(year, month):
+    """Export category analysis to an XLSX workbook; returns a temporary
+    file, or None"""
+    categories = get_category_analysis(year, month)
+    if categories is None or not categories:
+        return None
+    
+    workbook = Workbook(write_only=True)
+    _append_categories(workbook, categories)
+    return _save_workbook(workbook)
+
+# Files written for each month by export_year_charts, keyed by chart name
+YEAR_CHART_FILES = {
+    'category': 'category_chart_{year}_{month:02d}.png',
+    'income-vs-expense': 'income_vs_expense_{year}_{month:02d}.png',
+}
+
+def export_year_charts(year, layout='zip'):
+    """Export every monthly chart of a year as a zip of PNGs or one sprite sheet
+
+    The sprite sheet has a row per month (January first) with the category
+    chart on the left and the income vs expense chart on the right.
+    Returns the file's bytes, or None if the year has no transactions.
+    """
+    if layout not in ('zip', 'sprite'):
+        raise ValueError(f"Unknown layout: {layout}")
+    charts = get_year_charts(year)
+    if not charts:
+        return None
+
+    if layout == 'sprite':
+        return sprite_sheet([
+            [charts.get(month, {}).get(chart) for chart in YEAR_CHART_FILES]
+            for month in range(1, 13)
+        ])
+
+    archive = BytesIO()
+    # PNGs are already compressed, so they are stored as they are
+    with zipfile.ZipFile(archive, 'w', zipfile.ZIP_STORED) as zf:
+        for month, images in charts.items():
+            for chart, image in images.items():
+                zf.writestr(YEAR_CHART_FILES[chart].format(year=year, month=month), image)
+    return archive.getvalue()
@@ -0,0 +1,86 @@
+"""
+Benchmark the JSON journal, SQLite and sharded storage backends
+
+Usage:
+    python benchmarks/storage_backends.py --rows 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import models
+from app.models import BudgetDatabase, month_bounds
+from app.storage import JournalStorage, ShardedStorage, SQLiteStorage
+
+CATEGORIES = ["Food", "Transport", "Utilities", "Rent", "Shopping", "Health", "Salary", "Bonus"]
+
+
+def generate_transactions(rows, seed=42):
+    """Generate a synthetic ledger spread over ten years"""
+    rng = random.Random(seed)
+    start = date(2016, 1, 1)
+    for _ in range(rows):
+        is_income = rng.random() < 0.2
+        yield {
+            "type": "income" if is_income else "expense",
+            "amount": round(rng.uniform(1, 5000 if is_income else 500), 2),
+            "category": rng.choice(CATEGORIES[6:] if is_income else CATEGORIES[:6]),
+            "description": "benchmark",
+            "date": (start + timedelta(days=rng.randrange(3650))).isoformat()
+        }
+
+
+def timed(label, func, repeat=1):
+    """Run func repeat times and print the mean wall time"""
+    began = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    elapsed = (time.perf_counter() - began) / repeat
+    print(f"  {label:.<40} {elapsed * 1000:>10.2f} ms")
+    return result
+
+
+def run(name, storage, transactions, repeat):
+    """Load a backend with data and time the common operations"""
+    print(f"\n{name}")
+    timed("bulk load", lambda: storage.save({"transactions": transactions}))
+
+    models._storage = storage
+    models._cache.invalidate()
+    year, month = 2020, 6
+    start, end = month_bounds(year, month)
+
+    timed("first read (cold)", lambda: BudgetDatabase.get_totals())
+    timed("add transaction", lambda: BudgetDatabase.add_transaction(
+        "expense", 12.5, "Food", "benchmark", "2020-06-15"), repeat)
+    timed("transactions by month", lambda: BudgetDatabase.get_transactions_by_month(year, month), repeat)
+    timed("lifetime totals", lambda: BudgetDatabase.get_totals(), repeat)
+    timed("category totals for month", lambda: BudgetDatabase.get_category_totals(start, end), repeat)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"Generating {args.rows} transactions...")
+    transactions = list(generate_transactions(args.rows))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        run("journal (JSON snapshot + journal)",
+            JournalStorage(os.path.join(tmp, 'budget_data.json')), transactions, args.repeat)
+        run("sqlite",
+            SQLiteStorage(os.path.join(tmp, 'budget_data.db')), transactions, args.repeat)
+        run("sharded (one journal per month)",
+            ShardedStorage(os.path.join(tmp, 'data')), transactions, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -10,6 +10,71 @@ class Config:
     TESTING = False
     JSON_SORT_KEYS = False
 
+    # Storage: 'json' rewrites the whole file on every write and is the only
+    # format the standalone budget_tracker.py and app.py scripts read,
+    # 'journal' appends to a journal and periodically compacts it into the
+    # snapshot, 'sqlite' keeps transactions in an indexed SQLite database,
+    # 'sharded' keeps one journal file per month under SHARD_DIR
+    STORAGE_BACKEND = os.environ.get('BUDGET_STORAGE_BACKEND') or 'json'
+    DATA_FILE = os.environ.get('BUDGET_DATA_FILE') or 'budget_data.json'
+    SQLITE_FILE = os.environ.get('BUDGET_SQLITE_FILE') or 'budget_data.db'
+    SHARD_DIR = os.environ.get('BUDGET_SHARD_DIR') or 'data'
+    JOURNAL_COMPACT_MIN_ENTRIES = 1000
+    JOURNAL_COMPACT_RATIO = 1.0
+
+    # Seconds a journal or shard commit waits for concurrent writes to join
+    # its fsync; 0 still batches writes that arrive while a sync is running
+    COMMIT_WINDOW = float(os.environ.get('BUDGET_COMMIT_WINDOW') or 0)
+
+    # Largest array accepted by POST /api/transactions/batch
+    BATCH_MAX_ITEMS = 5000
+
+    # Default and largest page size of GET /api/transactions
+    TRANSACTIONS_PAGE_SIZE = 50
+    TRANSACTIONS_PAGE_MAX = 500
+
+    # Transactions read from storage per chunk of a streamed CSV export
+    EXPORT_CHUNK_SIZE = 2000
+
+    # Per-month summaries, rollups and slices kept by app.utils.month_memo
+    MONTH_MEMO_SIZE = 128
+
+    # Rendered chart images kept in memory; images evicted from memory are
+    # written to CHART_CACHE_DIR, when set, up to CHART_CACHE_DISK_BYTES
+    CHART_CACHE_BYTES = 32 * 1024 * 1024
+    CHART_CACHE_DIR = os.environ.get('BUDGET_CHART_CACHE_DIR')
+    CHART_CACHE_DISK_BYTES = 256 * 1024 * 1024
+
+    # Worker processes rendering charts (0 renders in the request thread),
+    # renders allowed to wait for a worker, and seconds to wait for a slot
+    # and for a render before answering 503
+    CHART_WORKERS = int(os.environ.get('BUDGET_CHART_WORKERS') or min(4, os.cpu_count() or 1))
+    CHART_QUEUE_SIZE = 16
+    CHART_RENDER_TIMEOUT = 30.0
+
+    # Largest width/height (pixels) and dpi accepted by the chart image routes
+    CHART_MAX_PIXELS = 4000
+    CHART_MAX_DPI = 300
+
+    # Rows validated and committed at a time by /api/import and `flask import`
+    IMPORT_CHUNK_SIZE = 10000
+
+    # Memory-mapped column files used for reports on the file backends
+    ANALYTICS_STORE = True
+    ANALYTICS_DIR = os.environ.get('BUDGET_ANALYTICS_DIR')
+
+    # Per-month sums and counts used for monthly reports on the file backends
+    ROLLUP_STORE = True
+    ROLLUP_FILE = os.environ.get('BUDGET_ROLLUP_FILE')
+    ROLLUP_FLUSH_EVERY = 50
+
+    # Lifetime, yearly, quarterly and monthly income/expense totals
+    RUNNING_TOTALS = True
+    RUNNING_TOTALS_FILE = os.environ.get('BUDGET_RUNNING_TOTALS_FILE')
+
+    # Period checked by the budget alert: 'all', 'year', 'quarter' or 'month'
+    BUDGET_ALERT_PERIOD = os.environ.get('BUDGET_ALERT_PERIOD') or 'all'
+
 class DevelopmentConfig(Config):
     """Development configuration"""
     DEBUG = True
@@ -23,6 +88,7 @@ class TestingConfig(Config):
     """Testing configuration"""
     TESTING = True
     DEBUG = True
+    CHART_WORKERS = 0
 
 config = {
     'development': DevelopmentConfig,
@@ -4,8 +4,10 @@ Budget Tracker Application Entry Point
 import os
 from app import create_app
 
-# Create Flask app
-app = create_app(os.environ.get('FLASK_ENV', 'development'))
+# Chart worker processes re-import this module as __mp_main__ when they
+# start; they only render charts and must not build an app of their own
+if __name__ != '__mp_main__':
+    app = create_app(os.environ.get('FLASK_ENV', 'development'))
 
 if __name__ == '__main__':
     app.run(debug=True, host='localhost', port=5000)
@@ -0,0 +1,53 @@
+"""
+Shared fixtures for the Budget Tracker tests
+"""
+import pytest
+from app import create_app
+from app.models import BudgetDatabase
+from app.utils import month_memo
+from config import TestingConfig
+
+BACKENDS = ("json", "journal", "sqlite", "sharded")
+
+
+def transaction(transaction_id, amount=1.0, date="2025-01-15", category="Food", kind="expense"):
+    """Build a transaction dictionary as storage holds it"""
+    return {"id": transaction_id, "type": kind, "amount": amount, "category": category,
+            "description": "", "date": date}
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Run the test inside an empty directory"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def ledger_config(backend, **overrides):
+    """Configuration using every analytics store, with files in the current directory"""
+    return {
+        "STORAGE_BACKEND": backend,
+        "DATA_FILE": "budget_data.json",
+        "SQLITE_FILE": "budget_data.db",
+        "SHARD_DIR": "data",
+        "ANALYTICS_STORE": True,
+        "ROLLUP_STORE": True,
+        "RUNNING_TOTALS": True,
+        **overrides,
+    }
+
+
+@pytest.fixture(params=BACKENDS)
+def database(request, workdir):
+    """BudgetDatabase configured with each storage backend in turn"""
+    BudgetDatabase.configure(ledger_config(request.param))
+    month_memo.clear()
+    yield request.param
+    month_memo.clear()
+
+
+@pytest.fixture(params=BACKENDS)
+def client(request, workdir, monkeypatch):
+    """Test client of an app using each storage backend in turn"""
+    monkeypatch.setattr(TestingConfig, "STORAGE_BACKEND", request.param)
+    return create_app('testing').test_client()
@@ -0,0 +1,173 @@
+"""
+Tests for the ledger cache, its listeners and consistency between processes
+"""
+import json
+import os
+import subprocess
+import sys
+import threading
+import pytest
+from app import models
+from app.analytics import ColumnarStore
+from app.models import BudgetDatabase, LedgerCache
+from app.storage import FileLock, JournalStorage
+from app.utils import get_monthly_summary, get_quarterly_summary
+from conftest import ledger_config, transaction
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def in_other_process(backend, code):
+    """Run code against the ledger in the current directory from a new process
+    and return what it printed, parsed as JSON"""
+    script = (
+        "import json\n"
+        "from app.models import BudgetDatabase\n"
+        "from conftest import ledger_config\n"
+        f"BudgetDatabase.configure(ledger_config({backend!r}))\n"
+        f"{code}\n"
+    )
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join([ROOT, os.path.join(ROOT, "tests")])}
+    result = subprocess.run([sys.executable, "-c", script], env=env, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout)
+
+
+def test_writes_from_another_process_are_seen(database):
+    record = BudgetDatabase.add_transaction("expense", 10, "Food", "", "2025-01-10")
+    assert BudgetDatabase.get_totals()["expenses"] == 10
+    assert BudgetDatabase.get_transaction(record["id"]) is not None
+
+    added = in_other_process(database, (
+        "record = BudgetDatabase.add_transaction('expense', 2, 'Food', '', '2025-01-11')\n"
+        "print(json.dumps(record))"
+    ))
+
+    assert BudgetDatabase.get_totals()["expenses"] == 12
+    assert BudgetDatabase.get_transaction(added["id"])["amount"] == 2
+    assert BudgetDatabase.get_month_rollup(2025, 1)["expense"]["Food"] == [12, 2]
+    assert BudgetDatabase.update_transaction(added["id"], {"amount": 3})["amount"] == 3
+    assert BudgetDatabase.delete_transaction_by_id(added["id"])
+    assert BudgetDatabase.get_totals()["expenses"] == 10
+
+
+def test_etag_is_the_same_in_every_process(database):
+    BudgetDatabase.add_transaction("expense", 10, "Food", "", "2025-01-10")
+    etag = BudgetDatabase.ledger_etag()
+
+    assert in_other_process(database, "print(json.dumps(BudgetDatabase.ledger_etag()))") == etag
+    BudgetDatabase.add_transaction("expense", 1, "Food", "", "2025-01-10")
+    assert BudgetDatabase.ledger_etag() != etag
+
+
+def test_columnar_store_follows_a_rebuild_by_another_process(database):
+    if database not in ("json", "journal"):
+        pytest.skip("only the file backends use the columnar store")
+    BudgetDatabase.add_transaction("expense", 10, "Food", "", "2025-01-10")
+    assert BudgetDatabase.get_totals()["expenses"] == 10
+
+    in_other_process(database, (
+        "BudgetDatabase.save_data(BudgetDatabase.load_data())\n"
+        "BudgetDatabase.add_transaction('expense', 2, 'Food', '', '2025-01-11')\n"
+        "print(json.dumps(BudgetDatabase.get_totals()))"
+    ))
+
+    assert BudgetDatabase.get_totals()["expenses"] == 12
+    assert BudgetDatabase.get_category_totals() == [("Food", 12)]
+
+
+def test_columnar_store_rereads_meta_written_by_another_instance(workdir):
+    lock = FileLock("ledger.lock")
+    a = ColumnarStore("columns", lock)
+    b = ColumnarStore("columns", lock)
+    a.rebuild([], "first")
+    assert a.totals()["count"] == 0
+
+    storage = JournalStorage("budget_data.json")
+    storage.save({"transactions": [transaction("A", 5.0), transaction("B", 7.0)]})
+    ledger = LedgerCache().get(storage)
+    b.rebuild(ledger, "second")
+
+    a.sync(ledger, "second")
+    assert a.totals() == {"count": 2, "income": 0.0, "expenses": 12.0}
+
+
+def test_cache_hit_does_not_wait_for_the_storage_lock(workdir):
+    storage = JournalStorage("budget_data.json")
+    storage.append(transaction("A"))
+    cache = LedgerCache()
+    cache.get(storage)
+
+    done = threading.Event()
+
+    def read():
+        cache.get(storage)
+        done.set()
+
+    with FileLock("budget_data.json.lock"):
+        threading.Thread(target=read).start()
+        assert done.wait(2)
+    assert cache.hits == 1
+
+
+def test_writes_commit_after_releasing_the_cache_lock(database, monkeypatch):
+    record = BudgetDatabase.add_transaction("expense", 10, "Food", "", "2025-01-10")
+    storage = models._storage
+    commit = storage.commit
+    held = []
+
+    def record_lock():
+        held.append(models._cache.lock._is_owned())
+        commit()
+
+    monkeypatch.setattr(storage, "commit", record_lock)
+    assert BudgetDatabase.update_transaction(record["id"], {"amount": 3})["amount"] == 3
+    assert BudgetDatabase.delete_transaction_by_id(record["id"])
+    assert not BudgetDatabase.delete_transaction_by_id(record["id"])
+    assert held == [False, False]
+
+
+def test_report_totals_are_exact_to_the_cent(database):
+    BudgetDatabase.add_transaction("expense", 0.1, "Food", "", "2025-02-03")
+    BudgetDatabase.add_transaction("expense", 0.2, "Rent", "", "2025-02-04")
+    BudgetDatabase.add_transaction("expense", 100.1, "Food", "", "2025-03-03")
+    BudgetDatabase.add_transaction("expense", 100.3, "Rent", "", "2025-01-09")
+
+    assert get_monthly_summary(2025, 2) == {"income": 0.0, "expenses": 0.3, "balance": -0.3}
+    assert get_quarterly_summary(2025, 1)["expenses"] == 200.7
+
+
+def test_legacy_unpadded_dates_load(workdir):
+    with open("budget_data.json", 'w') as f:
+        json.dump({"transactions": [
+            transaction("A", date="2025-1-5"),
+            transaction("B", date="not a date"),
+        ]}, f)
+
+    BudgetDatabase.configure(ledger_config("journal"))
+
+    assert [t["date"] for t in BudgetDatabase.get_all_transactions()] == ["2025-01-05"]
+
+
+def test_corrupt_rollup_file_is_rebuilt(workdir):
+    BudgetDatabase.configure(ledger_config("journal"))
+    BudgetDatabase.add_transaction("expense", 10, "Food", "", "2025-01-10")
+    assert BudgetDatabase.get_month_rollup(2025, 1)["expense"]["Food"] == [10, 1]
+    with open("budget_data.json.rollup.json", 'r+') as f:
+        f.truncate(10)
+
+    BudgetDatabase.configure(ledger_config("journal"))
+
+    assert BudgetDatabase.get_month_rollup(2025, 1)["expense"]["Food"] == [10, 1]
+    assert [name for name in os.listdir() if name.endswith(".tmp")] == []
+
+
+def test_corrupt_running_totals_file_is_rebuilt(workdir):
+    BudgetDatabase.configure(ledger_config("journal"))
+    BudgetDatabase.add_transaction("expense", 10, "Food", "", "2025-01-10")
+    assert BudgetDatabase.get_period_totals("month", "2025-01-10")["expenses"] == 10
+    with open("budget_data.json.totals.json", 'w') as f:
+        f.write('{"format": ')
+
+    BudgetDatabase.configure(ledger_config("journal"))
+
+    assert BudgetDatabase.get_period_totals("month", "2025-01-10")["expenses"] == 10
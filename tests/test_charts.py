@@ -0,0 +1,39 @@
+"""
+Tests for chart rendering in the process pool
+"""
+import os
+import runpy
+import threading
+from app.charts import ChartRenderer, render_chart
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CATEGORY_JOB = ('category', 2025, 1, [("Rent", 30.0), ("Food", 10.0)], 'png', (4, 3), 50)
+BARS_JOB = ('income-vs-expense', 2025, 1, [100.0, 40.0], 'svg', (4, 3), 50)
+
+
+def test_pool_renders_concurrent_requests(workdir):
+    renderer = ChartRenderer(workers=2, queue_size=4, timeout=60)
+    try:
+        results = [None] * 4
+
+        def render(index):
+            results[index] = renderer.render(*(CATEGORY_JOB if index % 2 else BARS_JOB))
+
+        threads = [threading.Thread(target=render, args=(index,)) for index in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert all(result.startswith(b'\x89PNG') for result in results[1::2])
+        assert all(b'<svg' in result for result in results[::2])
+        assert renderer.render_many([CATEGORY_JOB, BARS_JOB])[0] == results[1]
+    finally:
+        renderer.shutdown()
+    assert render_chart(*CATEGORY_JOB).startswith(b'\x89PNG')
+
+
+def test_chart_workers_do_not_build_the_app(workdir):
+    assert "app" not in runpy.run_path(os.path.join(ROOT, "run.py"), run_name="__mp_main__")
+    assert runpy.run_path(os.path.join(ROOT, "run.py"), run_name="run")["app"].name == "app"
@@ -0,0 +1,68 @@
+"""
+Tests for bulk import
+"""
+from io import StringIO
+from app.importer import import_transactions
+from app.models import BudgetDatabase
+
+HEADER = "type,amount,category,description,date\n"
+
+
+def csv(*rows):
+    return StringIO(HEADER + "".join(f"{row}\n" for row in rows))
+
+
+def counts(summary):
+    return summary["imported"], summary["duplicates"], summary["invalid"]
+
+
+def test_reimporting_a_file_skips_every_row(database):
+    rows = ["expense,12.50,Food,lunch,2025-01-05", "income,1000,Salary,,2025-01-31"]
+    assert counts(import_transactions(csv(*rows))) == (2, 0, 0)
+    assert counts(import_transactions(csv(*rows))) == (0, 2, 0)
+    assert BudgetDatabase.get_totals()["count"] == 2
+
+
+def test_identical_rows_within_a_file_are_all_kept(database):
+    lunch = "expense,12.50,Food,lunch,2025-01-05"
+    assert counts(import_transactions(csv(lunch, lunch, lunch))) == (3, 0, 0)
+
+
+def test_overlapping_import_counts_duplicates_per_occurrence(database):
+    lunch = "expense,12.50,Food,lunch,2025-01-05"
+    dinner = "expense,30,Food,dinner,2025-01-05"
+    import_transactions(csv(lunch, dinner))
+
+    # One lunch is already in the ledger, the second is a new purchase
+    assert counts(import_transactions(csv(lunch, lunch, dinner, "expense,5,Coffee,,2025-01-06"))) == (2, 2, 0)
+    assert BudgetDatabase.get_totals()["count"] == 4
+
+
+def test_invalid_rows_are_reported_and_skipped(database):
+    summary = import_transactions(csv("expense,abc,Food,,2025-01-05", "expense,5,Food,,2025-13-01",
+                                      "expense,5,Food,,2025-01-05"))
+    assert counts(summary) == (1, 0, 2)
+    assert [error["row"] for error in summary["errors"]] == [1, 2]
+
+
+def test_import_reads_in_chunks(database):
+    rows = [f"expense,{i + 1},Food,,2025-02-{i % 28 + 1:02d}" for i in range(25)]
+    assert counts(import_transactions(csv(*rows), chunk_size=4)) == (25, 0, 0)
+    assert counts(import_transactions(csv(*rows), chunk_size=4)) == (0, 25, 0)
+
+
+def test_non_finite_and_huge_amounts_are_invalid_rows(database):
+    summary = import_transactions(csv("expense,inf,Food,,2025-01-05", "expense,1e30,Food,,2025-01-05",
+                                      "expense,5,Food,,2025-01-05"))
+    assert counts(summary) == (1, 0, 2)
+    assert [error["message"] for error in summary["errors"]] == ["amount is out of range"] * 2
+
+
+def test_amounts_round_like_the_api(database):
+    BudgetDatabase.add_transaction("expense", 0.285, "Food", "", "2025-01-05")
+    BudgetDatabase.add_transaction("expense", 1.005, "Food", "", "2025-01-05")
+
+    summary = import_transactions(csv("expense,0.285,Food,,2025-01-05", "expense,1.005,Food,,2025-01-05",
+                                      "expense,2.675,Food,,2025-01-06"))
+    assert counts(summary) == (1, 2, 0)
+    assert BudgetDatabase.get_totals()["expenses"] == 3.98
@@ -0,0 +1,252 @@
+"""
+Tests for the API routes
+"""
+import csv
+import zipfile
+from datetime import date
+from io import BytesIO, StringIO
+from openpyxl import load_workbook
+
+
+def add(client, amount, date, category="Food", kind="expense", description=""):
+    response = client.post('/api/add-transaction', json={
+        "type": kind, "amount": amount, "category": category, "description": description, "date": date})
+    assert response.status_code == 200
+    return response.get_json()["data"]
+
+
+def test_patch_pads_the_date(client):
+    record = add(client, 10, "2025-01-10")
+
+    response = client.patch(f'/api/transactions/{record["id"]}', json={"date": "2025-2-5"})
+    assert response.get_json()["data"]["date"] == "2025-02-05"
+
+    page = client.get('/api/transactions?start=2025-02-01&end=2025-03-01').get_json()
+    assert [t["id"] for t in page["transactions"]] == [record["id"]]
+    assert client.get('/api/monthly-report/2025/2').get_json()["expenses"] == 10
+
+
+def test_report_covers_the_range_with_unpadded_dates(client):
+    add(client, 10, "2025-01-10")
+    add(client, 2.5, "2025-01-31", category="Rent")
+    add(client, 100, "2025-01-20", category="Salary", kind="income")
+    add(client, 7, "2025-02-01")
+
+    report = client.get('/api/report?start=2025-1-1&end=2025-2-1').get_json()
+    assert (report["start"], report["end"], report["count"]) == ("2025-01-01", "2025-02-01", 3)
+    assert (report["income"], report["expenses"], report["balance"]) == (100, 12.5, 87.5)
+    assert [c["category"] for c in report["categories"]] == ["Food", "Rent"]
+
+    assert client.get('/api/report?start=2026-01-01&end=2026-02-01').status_code == 404
+    assert client.get('/api/report?start=2025-01-01').status_code == 400
+
+
+def test_transactions_are_paged_by_cursor(client):
+    for day in range(1, 8):
+        add(client, day, f"2025-01-{day:02d}")
+    add(client, 50, "2024-12-31")
+    add(client, 60, "2025-02-01")
+
+    seen = []
+    url = '/api/transactions?start=2025-1-1&end=2025-2-1&limit=3&order=asc'
+    page = client.get(url).get_json()
+    while True:
+        seen.extend(t["date"] for t in page["transactions"])
+        if page["next_cursor"] is None:
+            break
+        page = client.get(f'{url}&cursor={page["next_cursor"]}').get_json()
+    assert seen == [f"2025-01-{day:02d}" for day in range(1, 8)]
+
+    page = client.get('/api/transactions?sort=amount&min_amount=5&limit=2').get_json()
+    assert [t["amount"] for t in page["transactions"]] == [60, 50]
+    page = client.get(f'/api/transactions?sort=amount&min_amount=5&limit=2&cursor={page["next_cursor"]}').get_json()
+    assert [t["amount"] for t in page["transactions"]] == [7, 6]
+
+    assert client.get('/api/transactions?cursor=bogus').status_code == 400
+    assert client.get('/api/transactions?start=January').status_code == 400
+
+
+def test_trends_compare_with_the_same_months_a_year_earlier(client):
+    add(client, 100, "2024-02-10", category="Salary", kind="income")
+    add(client, 40, "2024-02-11", category="Travel")
+    add(client, 200, "2025-01-10", category="Salary", kind="income")
+    add(client, 0.1, "2025-02-03")
+    add(client, 0.2, "2025-02-04")
+    add(client, 30, "2025-03-04", category="Rent")
+
+    trends = client.get('/api/trends?from=2025-01&to=2025-03').get_json()
+    assert trends["periods"] == ["2025-01", "2025-02", "2025-03"]
+    assert trends["count"] == [1, 2, 1]
+    assert trends["income"] == [200, 0, 0]
+    assert trends["expenses"] == [0, 0.3, 30]
+    assert trends["balance"] == [200, -0.3, -30]
+    assert trends["categories"] == {"Rent": [0, 0, 30], "Food": [0, 0.3, 0]}
+    assert trends["year_over_year"]["income"] == {
+        "previous": [0, 100, 0], "change": [200, -100, 0], "percent": [None, -100.0, None]}
+
+    quarters = client.get('/api/trends?from=2025-01&to=2025-03&group=quarter').get_json()
+    assert quarters["periods"] == ["2025-Q1"]
+    assert quarters["balance"] == [169.7]
+    assert quarters["year_over_year"]["balance"]["previous"] == [60]
+
+    assert client.get('/api/trends?from=2025-04&to=2025-01').status_code == 400
+    assert client.get('/api/trends?group=week').status_code == 400
+
+
+def test_batch_saves_valid_items_and_reports_each(client):
+    response = client.post('/api/transactions/batch', json=[
+        {"type": "expense", "amount": 5, "category": "Food", "description": "", "date": "2025-01-05"},
+        {"type": "expense", "amount": "abc", "category": "Food", "description": "", "date": "2025-01-05"},
+        {"type": "income", "amount": 50, "category": "Salary", "description": "", "date": "2025-01-06"},
+        {"type": "expense", "amount": 1, "category": "Food"},
+    ]).get_json()
+
+    assert [result["success"] for result in response["results"]] == [True, False, True, False]
+    assert response["results"][0]["data"]["amount"] == 5
+    assert response["message"] == "Added 2 of 4 transactions"
+    report = client.get('/api/monthly-report/2025/1').get_json()
+    assert (report["income"], report["expenses"]) == (50, 5)
+
+    assert client.post('/api/transactions/batch', json={"transactions": "no"}).status_code == 400
+
+
+def test_month_helpers_are_memoized_until_the_next_write(client):
+    add(client, 10, "2025-01-10")
+    client.get('/api/monthly-report/2025/1')
+    hits = client.get('/api/cache-stats').get_json()["month_memo"]["hits"]
+
+    assert client.get('/api/monthly-report/2025/1').get_json()["expenses"] == 10
+    assert client.get('/api/cache-stats').get_json()["month_memo"]["hits"] > hits
+
+    add(client, 5, "2025-01-11")
+    assert client.get('/api/monthly-report/2025/1').get_json()["expenses"] == 15
+    assert client.get('/api/category-analysis/2025/1').get_json()["categories"][0]["amount"] == 15
+
+
+def test_dashboard_sums_totals_and_top_categories(client):
+    add(client, 100, "2025-01-01", category="Salary", kind="income")
+    add(client, 60.1, "2025-01-02", category="Rent")
+    add(client, 30.2, "2025-01-03")
+    add(client, 9.7, "2025-01-04", category="Coffee")
+    add(client, 5, "2025-01-05", category="Coffee")
+
+    dashboard = client.get('/api/dashboard?top=2&recent=3').get_json()
+    assert (dashboard["count"], dashboard["income"], dashboard["expenses"], dashboard["balance"]) == (5, 100, 105, -5)
+    assert [(c["category"], c["amount"]) for c in dashboard["top_categories"]] == [("Rent", 60.1), ("Food", 30.2)]
+    assert dashboard["alert"]["alert"] is True
+    assert [t["date"] for t in dashboard["recent_transactions"]] == ["2025-01-05", "2025-01-04", "2025-01-03"]
+
+    assert client.get('/api/dashboard?top=-1').status_code == 400
+
+
+def test_read_endpoints_answer_304_until_the_ledger_changes(client):
+    add(client, 10, "2025-01-10")
+    for url in ('/api/transactions', '/api/monthly-report/2025/1', '/api/dashboard', '/api/budget-alert'):
+        response = client.get(url)
+        etag = response.headers["ETag"]
+        assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    add(client, 1, "2025-01-11")
+    response = client.get('/api/transactions', headers={"If-None-Match": etag})
+    assert response.status_code == 200 and response.headers["ETag"] != etag
+    assert client.get('/api/monthly-report/2030/1').headers.get("ETag") is None
+
+
+def test_charts_are_rendered_once_per_month_data(client):
+    add(client, 10, "2025-01-10")
+    url = '/api/chart/category/2025/1.png'
+    first = client.get(url)
+    misses = client.get('/api/cache-stats').get_json()["chart_cache"]["misses"]
+
+    add(client, 5, "2025-02-10")
+    again = client.get(url)
+    assert again.headers["ETag"] == first.headers["ETag"] and again.data == first.data
+    assert client.get('/api/cache-stats').get_json()["chart_cache"]["misses"] == misses
+
+    add(client, 5, "2025-01-11", category="Rent")
+    assert client.get(url).headers["ETag"] != first.headers["ETag"]
+
+
+def test_charts_are_served_as_png_and_svg(client):
+    add(client, 100, "2025-01-01", category="Salary", kind="income")
+    add(client, 10, "2025-01-10")
+
+    png = client.get('/api/chart/category/2025/1.png?width=300&height=200')
+    assert png.mimetype == 'image/png' and png.data.startswith(b'\x89PNG')
+    assert client.get('/api/chart/category/2025/1.png?width=300&height=200',
+                      headers={"If-None-Match": png.headers["ETag"]}).status_code == 304
+    svg = client.get('/api/chart/income-vs-expense/2025/1.svg')
+    assert svg.mimetype == 'image/svg+xml' and b'<svg' in svg.data
+
+    assert client.get('/api/chart/category/2025/2.png').status_code == 404
+    assert client.get('/api/chart/category/2025/1.png?dpi=1000').status_code == 400
+    assert client.get('/api/chart/category/2025/1.png?width=wide').status_code == 400
+
+
+def test_chart_data_has_the_plotted_series(client):
+    add(client, 100, "2025-01-01", category="Salary", kind="income")
+    add(client, 30, "2025-01-10", category="Rent")
+    add(client, 10, "2025-01-11")
+
+    category = client.get('/api/chart-data/category/2025/1').get_json()
+    assert (category["labels"], category["values"], category["total"]) == (["Rent", "Food"], [30, 10], 40)
+    assert category["percentages"] == [75, 25]
+    bars = client.get('/api/chart-data/income-vs-expense/2025/1').get_json()
+    assert (bars["labels"], bars["values"]) == (["Income", "Expenses"], [100, 40])
+
+    assert client.get('/api/chart-data/category/2025/2').status_code == 404
+
+
+def test_year_charts_download_as_zip_or_sprite(client):
+    add(client, 100, "2025-01-01", category="Salary", kind="income")
+    add(client, 10, "2025-03-10")
+
+    response = client.get('/api/charts/year/2025')
+    assert response.mimetype == 'application/zip'
+    with zipfile.ZipFile(BytesIO(response.data)) as archive:
+        assert sorted(archive.namelist()) == [
+            "category_chart_2025_03.png", "income_vs_expense_2025_01.png", "income_vs_expense_2025_03.png"]
+
+    sprite = client.get('/api/charts/year/2025?layout=sprite')
+    assert sprite.mimetype == 'image/png' and sprite.data.startswith(b'\x89PNG')
+
+    assert client.get('/api/charts/year/2024').status_code == 404
+    assert client.get('/api/charts/year/2025?layout=grid').status_code == 400
+
+
+def test_csv_exports_stream_every_transaction(client):
+    client.application.config['EXPORT_CHUNK_SIZE'] = 2
+    for day in range(1, 6):
+        add(client, day, f"2025-01-{day:02d}", description=f"item, {day}")
+    add(client, 9, "2025-02-01")
+
+    response = client.get('/api/export/all-transactions')
+    assert response.mimetype == 'text/csv' and response.is_streamed
+    rows = list(csv.reader(StringIO(response.get_data(as_text=True))))
+    assert rows[0] == ["id", "type", "amount", "category", "description", "date"]
+    assert [row[5] for row in rows[1:]] == ["2025-02-01"] + [f"2025-01-{day:02d}" for day in range(5, 0, -1)]
+    assert rows[2][4] == "item, 5"
+
+    report = client.get('/api/export/monthly-report/2025/1').get_data(as_text=True)
+    assert "Total Expenses,$15.00" in report
+    assert report.count("2025-01-") == 5 and "2025-02-01" not in report
+    assert client.get('/api/export/monthly-report/2025/3').status_code == 404
+
+
+def test_xlsx_exports_hold_typed_cells(client):
+    add(client, 100, "2025-01-01", category="Salary", kind="income")
+    add(client, 12.5, "2025-01-10", description="bad\x07text")
+
+    response = client.get('/api/export/monthly-report/2025/1/xlsx')
+    assert response.mimetype == 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    workbook = load_workbook(BytesIO(response.data))
+    assert workbook.sheetnames == ["Summary", "Categories", "Transactions"]
+    summary = {row[0]: row[1] for row in workbook["Summary"].iter_rows(values_only=True) if len(row) > 1}
+    assert (summary["Total Income"], summary["Total Expenses"], summary["Balance"]) == (100, 12.5, 87.5)
+    transactions = list(workbook["Transactions"].iter_rows(values_only=True))[1:]
+    assert [(row[2], row[4], row[5].date()) for row in transactions] == [
+        (12.5, "badtext", date(2025, 1, 10)), (100, None, date(2025, 1, 1))]
+
+    workbook = load_workbook(BytesIO(client.get('/api/export/all-transactions/xlsx').data))
+    assert workbook.sheetnames == ["Summary", "Transactions"] and workbook["Transactions"].max_row == 3
+    assert client.get('/api/export/category-analysis/2025/2/xlsx').status_code == 404
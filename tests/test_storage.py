@@ -0,0 +1,177 @@
+"""
+Tests for the storage backends
+"""
+import json
+import os
+import threading
+import pytest
+from app.models import BudgetDatabase
+from app.storage import (
+    FileLock,
+    JournalStorage,
+    JSONStorage,
+    ShardedStorage,
+    SQLiteStorage,
+    migrate_json_to_shards,
+    migrate_json_to_sqlite,
+    read_entries,
+)
+from conftest import ledger_config, transaction
+
+STORAGES = {
+    "json": lambda: JSONStorage("budget_data.json"),
+    "journal": lambda: JournalStorage("budget_data.json"),
+    "sqlite": lambda: SQLiteStorage("budget_data.db"),
+    "sharded": lambda: ShardedStorage("data"),
+}
+
+
+def ids(storage):
+    return sorted(t["id"] for t in storage.load()["transactions"])
+
+
+@pytest.mark.parametrize("backend", STORAGES)
+def test_round_trip(workdir, backend):
+    storage = STORAGES[backend]()
+    storage.save({"transactions": [transaction("A"), transaction("B", date="2025-02-01")]})
+    storage.append(transaction("C", amount=2.5))
+    storage.append_many([transaction("D"), transaction("E", date="2025-03-31")])
+    assert storage.update("B", {"amount": 7.25})
+    assert storage.delete("A")
+    storage.commit()
+
+    reopened = STORAGES[backend]()
+    assert ids(reopened) == ["B", "C", "D", "E"]
+    by_id = {t["id"]: t for t in reopened.load()["transactions"]}
+    assert by_id["B"]["amount"] == 7.25
+    assert by_id["C"]["amount"] == 2.5
+
+
+def test_journal_compaction_keeps_every_transaction(workdir):
+    storage = JournalStorage("budget_data.json", compact_min_entries=5)
+    storage.append_many([transaction(f"T{i}") for i in range(3)])
+    for i in range(3, 12):
+        storage.append(transaction(f"T{i}"))
+    storage.delete("T0")
+
+    assert os.path.getsize("budget_data.json.journal") < os.path.getsize("budget_data.json")
+    assert ids(JournalStorage("budget_data.json")) == sorted(f"T{i}" for i in range(1, 12))
+
+
+def tear(path):
+    """Leave a partial entry at the end of a journal, as a killed writer would"""
+    with open(path, 'a') as f:
+        f.write('{"op":"add","transaction":{"id":"TORN","type":"exp')
+
+
+def test_journal_append_after_torn_line_keeps_later_entries(workdir):
+    a = JournalStorage("budget_data.json")
+    b = JournalStorage("budget_data.json")
+    a.append(transaction("A1"))
+    b.load()
+    tear("budget_data.json.journal")
+    b.append(transaction("B1"))
+    b.append(transaction("B2"))
+
+    assert ids(JournalStorage("budget_data.json")) == ["A1", "B1", "B2"]
+    # Loading again finds the same entries; nothing was cut off
+    assert ids(JournalStorage("budget_data.json")) == ["A1", "B1", "B2"]
+
+
+def test_sharded_append_after_torn_line_keeps_later_entries(workdir):
+    a = ShardedStorage("data")
+    b = ShardedStorage("data")
+    a.append(transaction("A1"))
+    tear(os.path.join("data", "2025", "01.jsonl"))
+    b.append(transaction("B1"))
+    b.append(transaction("B2"))
+
+    assert ids(ShardedStorage("data")) == ["A1", "B1", "B2"]
+
+
+def test_read_entries_skips_bad_lines_and_recovers_glued_entry(workdir):
+    with open("journal", 'w') as f:
+        f.write('{"op":"add","transaction":{"id":"A"}}\n')
+        f.write('not json\n')
+        f.write('{"op":"add","tr{"op":"add","transaction":{"id":"B"}}\n')
+        f.write('{"op":"add","transaction":{"id":"C"}}\n')
+        f.write('{"op":"add","transaction":{"id":"D"}}')
+
+    assert [entry["transaction"]["id"] for entry in read_entries("journal")] == ["A", "B", "C"]
+
+
+def test_sharded_sees_transactions_written_by_another_instance(workdir):
+    a = ShardedStorage("data")
+    b = ShardedStorage("data")
+    a.append(transaction("A1"))
+    assert b.get("A1") is not None
+
+    a.append(transaction("A2"))
+    assert b.get("A2") is not None
+    a.update("A2", {"date": "2025-03-02"})
+    assert b.get("A2")["date"] == "2025-03-02"
+    assert b.update("A2", {"amount": 4.0})
+    assert a.get("A2")["amount"] == 4.0
+    assert b.delete("A2")
+    assert a.get("A2") is None
+    assert b.get("missing") is None
+
+
+def test_sqlite_signature_is_shared_and_moves_on_write(workdir):
+    a = SQLiteStorage("budget_data.db")
+    a.append(transaction("A"))
+    b = SQLiteStorage("budget_data.db")
+    assert a.signature() == b.signature()
+
+    before = a.signature()
+    b.update("A", {"amount": 3.0})
+    assert a.signature() == b.signature() != before
+
+
+def test_file_lock_excludes_other_lock_objects(workdir):
+    held = FileLock("ledger.lock")
+    other = FileLock("ledger.lock")
+    acquired = threading.Event()
+
+    def acquire():
+        with other:
+            acquired.set()
+
+    with held:
+        thread = threading.Thread(target=acquire)
+        thread.start()
+        assert not acquired.wait(0.2)
+    assert acquired.wait(5)
+    thread.join()
+
+
+def write_legacy_ledger():
+    with open("budget_data.json", 'w') as f:
+        json.dump({"transactions": [
+            transaction("A", amount=12.345, date="2025-1-5"),
+            transaction("B", amount=2.0, date="2025-01-20"),
+            transaction("C", date="not a date"),
+        ]}, f)
+
+
+MIGRATIONS = {
+    "sqlite": (migrate_json_to_sqlite, "budget_data.db"),
+    "sharded": (migrate_json_to_shards, "data"),
+}
+
+
+@pytest.mark.parametrize("backend", MIGRATIONS)
+def test_migration_normalizes_legacy_rows(workdir, backend):
+    write_legacy_ledger()
+    migrate, target = MIGRATIONS[backend]
+    assert migrate("budget_data.json", target) == 2
+
+    january = STORAGES[backend]().transactions_between("2025-01-01", "2025-02-01")
+    assert [(t["id"], t["date"], t["amount"]) for t in january] == [
+        ("A", "2025-01-05", 12.35), ("B", "2025-01-20", 2.0)]
+
+    BudgetDatabase.configure(ledger_config(backend))
+    page = BudgetDatabase.query_transactions(limit=1, sort="amount")
+    assert page["transactions"][0]["id"] == "A"
+    page = BudgetDatabase.query_transactions(limit=1, cursor=page["next_cursor"], sort="amount")
+    assert page["transactions"][0]["id"] == "B" and page["next_cursor"] is None